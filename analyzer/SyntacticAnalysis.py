@@ -96,11 +96,12 @@ class SyntacticAnalysis:
         return declarations
 
     def declaration(self):
+        start = self.tokens[self.current]
         identifiers = self.listaIdent()
         self.expect("COLON")
         var_type = self.type()
         self.expect("SEMICOLON")
-        return DeclarationNode(identifiers, var_type)
+        return self.at(DeclarationNode(identifiers, var_type), start)
 
     def listaIdent(self):
         identifiers = []
@@ -129,7 +130,16 @@ class SyntacticAnalysis:
             statements.append(self.stmt())
         return BlockNode(statements)
 
+    def at(self, node, token):
+        node.line = token.line
+        node.column = token.column
+        return node
+
     def stmt(self):
+        start = self.tokens[self.current]
+        return self.at(self.stmtNode(), start)
+
+    def stmtNode(self):
         token = self.tokens[self.current].token_type
         if token == "FOR":
             return self.forStmt()
@@ -1,5 +1,8 @@
 class ASTNode:
-    pass
+    # Linha e coluna do token que abre o nó; o parser preenche nos comandos
+    # e declarações, e o gerador passa para as instruções
+    line = None
+    column = None
 
 
 class ProgramNode(ASTNode):
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+
+from analyzer.execute import IntermediateCodeExecutor
+from analyzer.pipeline import compile_file
+from analyzer.runtime_io import FeedInputReader, InputPending, OutputBuffer
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class AsyncExecutor(IntermediateCodeExecutor):
+    # Executor para muitas sessões no mesmo event loop. O READ sem linha
+    # disponível pausa a execução e espera read_line() com await; a cada
+    # slice_size instruções o controle volta para o loop. budget limita o
+    # total de instruções da sessão.
+    def __init__(self, instructions, read_line, output=None, symbols=None, slice_size=1000, budget=None, drain=None):
+        super().__init__(instructions, output or OutputBuffer(), FeedInputReader(), symbols)
+        self.read_line = read_line  # corrotina: próxima linha ('' ou b'' no fim)
+        self.drain = drain  # corrotina opcional chamada depois de cada flush
+        self.slice_size = slice_size
+        self.budget = budget
+
+    async def run(self):
+        try:
+            while True:
+                max_steps = self.slice_size
+                if self.budget is not None:
+                    if self.steps >= self.budget:
+                        raise BudgetExceeded(f"Limite de {self.budget} instruções excedido")
+                    max_steps = min(max_steps, self.budget - self.steps)
+                try:
+                    if self._run(max_steps):
+                        break
+                except InputPending:
+                    # O READ não chegou a executar: o pc continua nele
+                    self.steps -= 1
+                    await self._flush()
+                    line = await self.read_line()
+                    if isinstance(line, bytes):
+                        line = line.decode("utf-8")
+                    if line:
+                        self.reader.feed(line)
+                    else:
+                        self.reader.close()
+                    continue
+                await self._flush()
+                await asyncio.sleep(0)
+        finally:
+            self.out.flush()
+        await self._flush()
+        return self.out.getvalue()
+
+    async def _flush(self):
+        self.out.flush()
+        if self.drain is not None:
+            await self.drain()
+
+
+class WriterStream:
+    # Adapta um asyncio.StreamWriter para o OutputBuffer
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, text):
+        self.writer.write(text.encode("utf-8"))
+
+    def flush(self):
+        pass
+
+
+async def serve(program, host, port, slice_size=1000, budget=None):
+    # Uma sessão por conexão: a entrada do programa vem do socket e a saída
+    # volta por ele
+    async def session(reader, writer):
+        executor = AsyncExecutor(
+            program.instructions, reader.readline, OutputBuffer(WriterStream(writer), capture=False),
+            program.symbols, slice_size, budget, writer.drain,
+        )
+        try:
+            await executor.run()
+        except Exception as e:
+            writer.write(f"Erro: {e}\n".encode("utf-8"))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(session, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m analyzer.async_execute",
+        description="Atende sessões interativas de um programa Pascal-- por TCP, todas no mesmo processo",
+    )
+    parser.add_argument("arquivo", help="caminho do programa .pas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("-O", dest="opt_level", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--slice", dest="slice_size", type=int, default=1000, help="instruções entre pausas para o event loop")
+    parser.add_argument("--budget", type=int, help="máximo de instruções por sessão")
+    args = parser.parse_args()
+
+    program = compile_file(args.arquivo, args.opt_level)
+    print(f"{args.arquivo}: ouvindo em {args.host}:{args.port}")
+    try:
+        asyncio.run(serve(program, args.host, args.port, args.slice_size, args.budget))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
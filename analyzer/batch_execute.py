@@ -0,0 +1,451 @@
+from analyzer.control_flow import ControlFlowGraph, LiveVariables
+from analyzer.execute import IntermediateCodeExecutor
+from analyzer.runtime_io import InputReader, OutputBuffer
+from analyzer.typed_execute import KIND_TYPES, TypedExecutor
+
+try:
+    import numpy as np
+except ImportError:  # sem NumPy cada instância roda no executor escalar
+    np = None
+
+# Inteiros ficam abaixo de 2**52 em módulo: int64 não estoura e a conversão
+# para float64 é exata, então misturar com reais dá o mesmo que em Python.
+# A lane que passa disso continua no TypedExecutor.
+SAFE_INT = 2 ** 52
+STORAGE = {"i": np.int64, "r": np.float64, "s": object} if np is not None else {}
+INITIAL = {"i": 0, "r": 0.0, "s": ""}
+
+COMPARE = {
+    "LT": "less", "GT": "greater", "LTE": "less_equal", "GTE": "greater_equal", "EQUALS": "equal",
+    "BR_LT": "less", "BR_GT": "greater", "BR_LTE": "less_equal", "BR_GTE": "greater_equal",
+    "BR_EQ": "equal", "FOR_INIT": "less_equal",
+}
+
+
+class LaneGroup:
+    # Instâncias que estão no mesmo pc: cada variável é um vetor com um valor
+    # por lane, na ordem de lanes
+    def __init__(self, lanes, values, pc):
+        self.lanes = lanes
+        self.values = values
+        self.pc = pc
+
+    def subset(self, mask, pc, names=None):
+        # names: só essas variáveis (as vivas em pc) vão para o novo grupo
+        return LaneGroup(self.lanes[mask], {
+            name: vec[mask] for name, vec in self.values.items() if names is None or name in names
+        }, pc)
+
+
+class LaneOutput:
+    # Saída do TypedExecutor que as lanes compartilham: vai para a saída da
+    # lane que está rodando nele
+    def __init__(self):
+        self.target = None
+
+    def write(self, text):
+        self.target.write(text)
+
+    def flush(self):
+        self.target.flush()
+
+    def getvalue(self):
+        return self.target.getvalue()
+
+
+class BatchExecutor:
+    # Roda o mesmo código intermediário para várias entradas ao mesmo tempo.
+    # As lanes andam juntas enquanto os desvios concordam; num desvio
+    # divergente o grupo se divide, as partes esperam e roda sempre o grupo
+    # de menor pc, de modo que as partes que chegam ao mesmo pc voltam a se
+    # juntar. Grupos com menos de min_lanes lanes seguem lane a lane no
+    # TypedExecutor até o pc de um grupo que está esperando; lanes que
+    # sairiam da faixa segura de inteiros terminam nele. Programas que não
+    # dá para tipar estaticamente rodam inteiros no executor escalar.
+    def __init__(self, instructions, inputs, symbols=None, min_lanes=8):
+        self.instructions = instructions
+        self.symbols = symbols or {}
+        self.min_lanes = min_lanes
+        self.outputs = [OutputBuffer() for _ in inputs]
+        self.readers = [InputReader(text=text) for text in inputs]
+        self.errors = [None] * len(inputs)
+        self.scalar_lanes = 0  # instâncias que terminaram no executor escalar
+        self.labels = {inst[1]: idx for idx, inst in enumerate(instructions) if inst[0] == "LABEL"}
+        self._scalar = IntermediateCodeExecutor([], symbols=self.symbols)  # constantes e leituras
+        # Um só TypedExecutor compilado; cada lane carrega nele o seu estado
+        self.lane_output = LaneOutput()
+        self.typed = TypedExecutor(instructions, self.lane_output, None, self.symbols)
+        self.kinds = {name: kind for name, (kind, _) in self.typed.slots.items()}
+        self.fallback_reason = self.typed.fallback_reason
+        if np is None:
+            self.fallback_reason = "NumPy não instalado"
+        elif self.fallback_reason is None:
+            self.fallback_reason = self._load_constants()
+
+    def _load_constants(self):
+        # Constantes convertidas uma vez só; strings viram escalares object
+        # para o NumPy não tentar tratá-las como texto de largura fixa
+        self.constants = {}
+        for inst in self.instructions:
+            for arg in inst[1:]:
+                if arg in self.kinds or arg in self.labels or arg in self.constants:
+                    continue
+                value = self._scalar._get_value(arg)
+                if isinstance(value, int) and abs(value) >= SAFE_INT:
+                    return f"constante fora da faixa segura: {arg}"
+                self.constants[arg] = np.array(value, dtype=object) if isinstance(value, str) else value
+        return None
+
+    def run(self):
+        if self.fallback_reason is not None:
+            for lane in range(len(self.outputs)):
+                if self.typed.handlers is not None:
+                    self._run_typed(lane, 0, {})
+                else:
+                    self._run_scalar(lane, IntermediateCodeExecutor(
+                        self.instructions, self.outputs[lane], self.readers[lane], self.symbols
+                    ))
+            return [out.getvalue() for out in self.outputs]
+
+        self.waiting = {}  # pc -> grupo parado ali até ser o de menor pc
+        self.live = self._live_at_blocks()
+        self._park(LaneGroup(np.arange(len(self.outputs)), {}, 0))
+        with np.errstate(all="ignore"):
+            while self.waiting:
+                self._run_group(self.waiting.pop(min(self.waiting)))
+        return [out.getvalue() for out in self.outputs]
+
+    # Executor escalar
+
+    def _run_scalar(self, lane, executor):
+        self.scalar_lanes += 1
+        try:
+            executor.run()
+        except Exception as e:
+            self.errors[lane] = e
+
+    def _run_typed(self, lane, pc, values, stop=frozenset(), pending=None):
+        # Uma lane no TypedExecutor compartilhado, a partir de pc com os
+        # valores dados (None: os que já estão nele). Devolve o pc de stop em
+        # que parou, ou None se terminou (ou deu erro).
+        typed = self.typed
+        typed.reference.reader = self.readers[lane]
+        self.lane_output.target = self.outputs[lane]
+        try:
+            if values is not None:
+                typed.load(values)
+            if pending:
+                typed._deoptimize(pc, pending)
+                stopped = None
+            else:
+                stopped = typed.run_until(pc, stop)
+        except Exception as e:
+            self.errors[lane] = e
+            stopped = None
+        if stopped is None:
+            self.scalar_lanes += 1
+        return stopped
+
+    def _lane_values(self, group, position):
+        return {
+            name: vec[position].item() if self.kinds[name] != "s" else vec[position]
+            for name, vec in group.values.items()
+        }
+
+    def _to_scalar(self, group, pc, mask, pending=None):
+        # As lanes da máscara terminam no TypedExecutor, continuando em pc com
+        # os valores que cada uma já tem (e os de pending, fora da faixa)
+        for position in np.nonzero(mask)[0].tolist():
+            lane = int(group.lanes[position])
+            self._run_typed(lane, pc, self._lane_values(group, position), pending=(pending or {}).get(position))
+
+    def _run_lanes(self, group):
+        # Poucas lanes para valer a pena vetorizar: cada uma roda no
+        # TypedExecutor até o pc de um grupo que está esperando e volta a ser
+        # vetorial junto com ele, ou até o fim se ninguém está esperando
+        stop = frozenset(self.waiting)
+        stopped = {}  # pc -> [(lane, valores)]
+        for position, lane in enumerate(group.lanes.tolist()):
+            pc = self._run_typed(lane, group.pc, self._lane_values(group, position), stop)
+            if pc is None:
+                continue
+            live = self.live.get(pc)
+            values = {
+                name: self.typed._slot_value(*self.typed.slots[name])
+                for name in (self.kinds if live is None else live) if name in self.kinds
+            }
+            if any(self.kinds[name] == "i" and abs(value) >= SAFE_INT for name, value in values.items()):
+                self._run_typed(lane, pc, None)
+                continue
+            stopped.setdefault(pc, []).append((lane, values))
+        for pc, lanes in stopped.items():
+            values = {
+                name: np.array([lane_values[name] for _, lane_values in lanes], dtype=STORAGE[self.kinds[name]])
+                for name in lanes[0][1]
+            }
+            self._park(LaneGroup(np.array([lane for lane, _ in lanes]), values, pc))
+
+    # Execução vetorial
+
+    def _live_at_blocks(self):
+        # Variáveis vivas no início de cada bloco (depois dos LABELs), que é
+        # onde os grupos esperam: só elas são divididas e juntadas
+        cfg = ControlFlowGraph(self.instructions)
+        liveness = LiveVariables().solve(cfg)
+        live = {}
+        pc = 0
+        for block in cfg.blocks:
+            start = pc
+            pc += len(block.instructions)
+            while start < pc and self.instructions[start][0] == "LABEL":
+                start += 1
+            if start < pc:
+                live[start] = liveness.block_in[block.index]
+        return live
+
+    def _live(self, pc):
+        count = len(self.instructions)
+        while pc < count and self.instructions[pc][0] == "LABEL":
+            pc += 1
+        return self.live.get(pc)
+
+    def _park(self, group):
+        # Deixa o grupo esperando no primeiro pc depois dos LABELs (onde o
+        # TypedExecutor chega pelos saltos); quem chega ao mesmo pc se junta
+        count = len(self.instructions)
+        while group.pc < count and self.instructions[group.pc][0] == "LABEL":
+            group.pc += 1
+        if group.pc >= count:
+            return
+        live = self.live.get(group.pc)
+        if live is not None:
+            group.values = {name: vec for name, vec in group.values.items() if name in live}
+        other = self.waiting.get(group.pc)
+        self.waiting[group.pc] = group if other is None else self._merge(other, group)
+
+    def _merge(self, first, second):
+        # Os tipos de cada variável são fixos (os slots do TypedExecutor), então
+        # dois grupos no mesmo pc sempre podem ser concatenados; a variável que
+        # um deles ainda não escreveu tem o valor inicial do tipo
+        names = first.values.keys() | second.values.keys()
+        live = self.live.get(first.pc)
+        if live is not None:
+            names &= live
+        values = {}
+        for name in names:
+            values[name] = np.concatenate([self._vector(first, name), self._vector(second, name)])
+        return LaneGroup(np.concatenate([first.lanes, second.lanes]), values, first.pc)
+
+    def _vector(self, group, name):
+        value = group.values.get(name)
+        if value is None:
+            kind = self.kinds[name]
+            return np.full(len(group.lanes), INITIAL[kind], dtype=STORAGE[kind])
+        return value
+
+    def _run_group(self, group):
+        count = len(self.instructions)
+        while group.pc < count:
+            if len(group.lanes) < self.min_lanes:
+                self._run_lanes(group)
+                return
+            previous = group.pc
+            op, arg1, arg2, res = self.instructions[group.pc]
+            following = group.pc + 1
+
+            if op == "LABEL":
+                group.pc = following
+            elif op == "JUMP":
+                group.pc = self.labels[arg1]
+            elif op == "IF":
+                taken = self._truth(self._operand(group, arg1))
+                group = self._branch(group, taken, self.labels[arg2], self.labels[res])
+            elif op in COMPARE and op.startswith(("BR_", "FOR_")):
+                taken = self._compare(op, self._operand(group, arg1), self._operand(group, arg2))
+                group = self._branch(group, taken, following, self.labels[res])
+            elif op == "FOR_NEXT":
+                counter = group.values[arg1] + 1
+                unsafe = np.abs(counter) >= SAFE_INT
+                if unsafe.any():
+                    group = self._drop_unsafe(group, unsafe)
+                    continue
+                group.values[arg1] = counter
+                taken = counter <= self._operand(group, arg2)
+                group = self._branch(group, taken, self.labels[res], following)
+            elif op == "CALL":
+                group = self._call(group, arg1, arg2, res)
+                if group is None:
+                    return
+                group.pc = following
+            else:
+                result = self._compute(group, op, arg2, res)
+                if isinstance(result, LaneGroup):
+                    group = result
+                    continue
+                group.values[arg1] = self._store(arg1, result, len(group.lanes))
+                group.pc = following
+
+            if group is None:
+                return
+            if not self.waiting:
+                continue
+            # Chegou onde outro grupo espera: seguem juntos. Um salto para
+            # depois do menor pc em espera deixa este grupo esperando.
+            if group.pc in self.waiting:
+                group = self._merge(self.waiting.pop(group.pc), group)
+            elif group.pc != previous + 1 and group.pc > min(self.waiting):
+                self._park(group)
+                return
+
+    def _branch(self, group, taken, target_true, target_false):
+        taken = self._lanes(group, taken)
+        if taken.all():
+            group.pc = target_true
+            return group
+        if not taken.any():
+            group.pc = target_false
+            return group
+        # Divergiu: as duas partes esperam e roda a de menor pc
+        self._park(group.subset(taken, target_true, self._live(target_true)))
+        self._park(group.subset(~taken, target_false, self._live(target_false)))
+        return None
+
+    def _drop_unsafe(self, group, unsafe):
+        # Lanes cujo inteiro sairia da faixa segura refazem a instrução no
+        # TypedExecutor; as outras continuam no grupo
+        self._to_scalar(group, group.pc, unsafe)
+        return group.subset(~unsafe, group.pc)
+
+    def _operand(self, group, arg):
+        value = group.values.get(arg)
+        return self.constants[arg] if value is None else value
+
+    def _lanes(self, group, mask):
+        # Máscara por lane mesmo quando os dois operandos eram constantes
+        return mask if np.ndim(mask) else np.full(len(group.lanes), bool(mask))
+
+    def _kind_of(self, value):
+        if isinstance(value, np.ndarray):
+            return {"i": "i", "f": "r", "O": "s"}[value.dtype.kind]
+        if isinstance(value, int):
+            return "i"
+        return "r" if isinstance(value, float) else "s"
+
+    def _truth(self, value):
+        if self._kind_of(value) == "s":
+            return np.array([bool(item) for item in np.ravel(value)], dtype=bool).reshape(np.shape(value))
+        return np.not_equal(value, 0)
+
+    def _compare(self, op, left, right):
+        return np.asarray(getattr(np, COMPARE[op])(left, right), dtype=bool)
+
+    def _compute(self, group, op, arg2, res):
+        left = self._operand(group, arg2)
+        if op == "ATT":
+            return left
+        if op == "NOT":
+            return (~self._truth(left)).astype(np.int64)
+        right = self._operand(group, res)
+        if op == "AND":
+            return (self._truth(left) & self._truth(right)).astype(np.int64)
+        if op == "OR":
+            return (self._truth(left) | self._truth(right)).astype(np.int64)
+        if op in COMPARE:
+            return self._compare(op, left, right).astype(np.int64)
+
+        integers = self._kind_of(left) == "i" and self._kind_of(right) == "i"
+        if op == "ADD":
+            result = np.add(left, right)
+        elif op == "SUB":
+            result = np.subtract(left, right)
+        elif op == "MUL":
+            if integers:
+                # Com dois fatores até 2**52 o int64 pode dar a volta: a
+                # estimativa em float decide quem sai da faixa segura
+                estimate = np.multiply(np.asarray(left, dtype=np.float64), right)
+                unsafe = np.abs(estimate) >= SAFE_INT
+                if unsafe.any():
+                    return self._drop_unsafe(group, self._lanes(group, unsafe))
+            result = np.multiply(left, right)
+        else:
+            zero = np.equal(right, 0)
+            divisor = np.where(zero, 1, right)
+            if op == "DIV":
+                result = np.where(zero, 0.0, np.true_divide(left, divisor))
+            elif op == "INT_DIV":
+                result = np.where(zero, 0, np.floor_divide(left, divisor))
+            else:
+                result = np.where(zero, 0, np.remainder(left, divisor))
+        if integers:
+            unsafe = np.abs(result) >= SAFE_INT
+            if unsafe.any():
+                return self._drop_unsafe(group, self._lanes(group, unsafe))
+        return result
+
+    def _store(self, name, value, size):
+        # As conversões de _set_variable para o tipo do destino
+        # Os vetores nunca são alterados no lugar, então podem ser
+        # compartilhados entre variáveis
+        kind = self.kinds[name]
+        dtype = STORAGE[kind]
+        if np.ndim(value) == 0:
+            item = value.item() if isinstance(value, np.ndarray) else value
+            return np.full(size, str(item) if kind == "s" else item, dtype=dtype)
+        if kind == "s" and value.dtype.kind != "O":
+            return np.array([str(item) for item in value.tolist()], dtype=object)
+        return value if value.dtype == dtype else value.astype(dtype)
+
+    def _call(self, group, function, arg2, res):
+        if function == "READ":
+            return self._read(group, arg2)
+        operands = [arg2, res] if function == "WRITE2" else [arg2]
+        for arg in operands:
+            value = np.broadcast_to(self._operand(group, arg), group.lanes.shape)
+            for lane, item in zip(group.lanes.tolist(), value.tolist()):
+                if isinstance(item, str):
+                    item = item.replace("\\n", "\n")
+                self.outputs[lane].write(str(item))
+        if function == "WRITELN":
+            for lane in group.lanes.tolist():
+                self.outputs[lane].write("\n")
+        return group
+
+    def _read(self, group, name):
+        # Leitura lane a lane com as conversões e erros do executor escalar
+        kind = self.kinds[name]
+        values = []
+        alive = np.ones(len(group.lanes), dtype=bool)
+        unsafe = np.zeros(len(group.lanes), dtype=bool)
+        pending = {}
+        current = group.values.get(name)
+        for position, lane in enumerate(group.lanes.tolist()):
+            reader = self._scalar
+            reader.reader = self.readers[lane]
+            # Como no TypedExecutor, o slot já existe com o valor inicial do tipo
+            item = current[position] if current is not None else INITIAL[kind]
+            if kind != "s" and current is not None:
+                item = item.item()
+            reader.variables = {name: {"value": item, "type": KIND_TYPES[kind]}}
+            try:
+                reader._set_variable(name, reader._read_value(name))
+            except Exception as e:
+                # O escalar pararia aqui com o mesmo erro
+                self.errors[lane] = e
+                alive[position] = False
+                values.append(0 if kind != "s" else "")
+                continue
+            value = reader.variables[name]["value"]
+            if kind == "i" and abs(value) >= SAFE_INT:
+                unsafe[position] = True
+                pending[position] = {name: reader.variables[name]}
+                value = 0
+            values.append(value)
+        group.values[name] = np.array(values, dtype=STORAGE[kind])
+        if unsafe.any():
+            self._to_scalar(group, group.pc + 1, unsafe, pending)
+            alive &= ~unsafe
+        if not alive.any():
+            return None
+        if not alive.all():
+            group = group.subset(alive, group.pc)
+        return group
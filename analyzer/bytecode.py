@@ -0,0 +1,143 @@
+import marshal
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from analyzer.control_flow import branch_targets
+
+# Arquivo .pmmc:
+#   cabeçalho  magic, versão, nível de otimização, crc32 e tamanho do corpo
+#   corpo      marshal de (código, constantes, símbolos)
+# O código é uma sequência de int32, quatro por instrução: o opcode (índice
+# em OPCODES) e três operandos. Operando >= 0 é índice na tabela de
+# constantes; operando < 0 é um destino de salto já resolvido, -(i + 1), onde
+# i é a posição do LABEL.
+# O decode volta para as tuplas de strings que os executores leem: o .pmmc
+# poupa a compilação, não o custo de despacho de cada instrução.
+MAGIC = b"PMMC"
+VERSION = 2
+HEADER = struct.Struct("<4sHHII")
+
+# A ordem define o número de cada opcode: só acrescentar no fim e mudar
+# VERSION se algum sair ou mudar de significado. Só entra o que algum
+# executor roda (EQ e NEQ, de '==' e '<>', não rodam).
+OPCODES = (
+    "ATT", "ADD", "SUB", "MUL", "DIV", "MOD", "INT_DIV",
+    "LT", "GT", "LTE", "GTE", "EQUALS", "AND", "OR", "NOT",
+    "LABEL", "JUMP", "IF", "CALL",
+    "BR_LT", "BR_GT", "BR_LTE", "BR_GTE", "BR_EQ",
+    "FOR_INIT", "FOR_NEXT",
+)
+OPCODE_NUMBERS = {op: number for number, op in enumerate(OPCODES)}
+
+
+class BytecodeError(Exception):
+    pass
+
+
+class BytecodeProgram:
+    def __init__(self, instructions, symbols, opt_level=1):
+        self.instructions = instructions
+        self.symbols = symbols
+        self.opt_level = opt_level
+
+
+def _target_positions(inst):
+    # Posições (1 a 3) dos operandos que são labels de destino
+    targets = set(branch_targets(inst))
+    return [pos for pos in (1, 2, 3) if inst[pos] in targets and inst[0] != "LABEL"]
+
+
+def encode(instructions, symbols, opt_level=1):
+    labels = {inst[1]: idx for idx, inst in enumerate(instructions) if inst[0] == "LABEL"}
+    pool = []
+    pool_index = {}
+    code = array("i")
+    for inst in instructions:
+        if inst[0] not in OPCODE_NUMBERS:
+            raise BytecodeError(f"Opcode desconhecido: {inst[0]}")
+        code.append(OPCODE_NUMBERS[inst[0]])
+        targets = _target_positions(inst)
+        for pos in (1, 2, 3):
+            arg = inst[pos]
+            if pos in targets:
+                if arg not in labels:
+                    raise BytecodeError(f"Label não encontrado para {inst[0]}: {arg}")
+                code.append(-(labels[arg] + 1))
+                continue
+            if arg not in pool_index:
+                pool_index[arg] = len(pool)
+                pool.append(arg)
+            code.append(pool_index[arg])
+    if sys.byteorder != "little":
+        code.byteswap()
+    body = marshal.dumps((code.tobytes(), tuple(pool), dict(symbols)))
+    header = HEADER.pack(MAGIC, VERSION, opt_level, zlib.crc32(body), len(body))
+    return header + body
+
+
+def decode(data):
+    if len(data) < HEADER.size:
+        raise BytecodeError("Arquivo de bytecode truncado")
+    magic, version, opt_level, checksum, size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise BytecodeError("Não é um arquivo de bytecode Pascal--")
+    if version != VERSION:
+        raise BytecodeError(f"Versão de bytecode {version} não suportada (esperada {VERSION})")
+    body = bytes(data[HEADER.size:HEADER.size + size])
+    if len(body) != size or zlib.crc32(body) != checksum:
+        raise BytecodeError("Bytecode corrompido: checksum não confere")
+    raw_code, pool, symbols = marshal.loads(body)
+
+    code = array("i")
+    code.frombytes(raw_code)
+    if sys.byteorder != "little":
+        code.byteswap()
+    count = len(code) // 4
+    instructions = []
+    for idx in range(count):
+        opcode, *operands = code[4 * idx:4 * idx + 4]
+        args = []
+        for operand in operands:
+            if operand >= 0:
+                args.append(pool[operand])
+            else:
+                # O LABEL de destino pode vir depois: guarda a posição e
+                # troca pelo nome quando todas as instruções existirem
+                args.append(-operand - 1)
+        instructions.append([OPCODES[opcode]] + args)
+    for inst in instructions:
+        for pos in (1, 2, 3):
+            if isinstance(inst[pos], int):
+                inst[pos] = instructions[inst[pos]][1]
+    return BytecodeProgram([tuple(inst) for inst in instructions], symbols, opt_level)
+
+
+def write_bytecode(path, instructions, symbols, opt_level=1):
+    data = encode(instructions, symbols, opt_level)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def read_bytecode(path):
+    with open(path, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise BytecodeError("Arquivo de bytecode vazio")
+        with data:
+            return decode(data)
+
+
+def disassemble(program):
+    lines = [
+        f"; bytecode v{VERSION}, -O{program.opt_level}, "
+        f"{len(program.instructions)} instruções, {len(program.symbols)} símbolos",
+    ]
+    for name, var_type in program.symbols.items():
+        lines.append(f"; {name}: {var_type}")
+    for idx, inst in enumerate(program.instructions, start=1):
+        lines.append(f"{idx:02} - {inst}")
+    return lines
@@ -0,0 +1,156 @@
+from analyzer.control_flow import (
+    COMPARE_BRANCHES,
+    DEFINING_OPS,
+    ControlFlowGraph,
+    LiveVariables,
+    branch_targets,
+    instruction_def,
+    retarget,
+)
+
+# Desvio com a comparação negada (não há BR para "diferente")
+INVERSE_BRANCHES = {
+    COMPARE_BRANCHES["LT"]: COMPARE_BRANCHES["GTE"],
+    COMPARE_BRANCHES["GTE"]: COMPARE_BRANCHES["LT"],
+    COMPARE_BRANCHES["GT"]: COMPARE_BRANCHES["LTE"],
+    COMPARE_BRANCHES["LTE"]: COMPARE_BRANCHES["GT"],
+}
+
+
+class CodeCleaner:
+    # Limpeza do código depois das outras passadas: blocos inalcançáveis,
+    # saltos para saltos, labels sem uso, JUMP para a instrução seguinte e
+    # atribuições cujo valor nunca é lido. Repete até não mudar nada.
+    def __init__(self, optimizer):
+        self.optimizer = optimizer  # IROptimizer: tipos e constantes
+        self.unreachable = 0
+        self.threaded = 0
+        self.labels = 0
+        self.jumps = 0
+        self.dead_stores = 0
+
+    def clean(self, instructions):
+        while True:
+            before = instructions
+            instructions = self.thread_jumps(instructions)
+            instructions = self.remove_unreachable(instructions)
+            instructions = self.remove_jumps_to_next(instructions)
+            instructions = self.remove_unused_labels(instructions)
+            instructions = self.remove_dead_stores(instructions)
+            if instructions == before:
+                return instructions
+
+    def thread_jumps(self, instructions):
+        # Label seguido de outros labels ou de um JUMP equivale ao destino final
+        targets = {}
+        pending = []
+        for inst in instructions:
+            if inst[0] == "LABEL":
+                pending.append(inst[1])
+                continue
+            for label in pending:
+                targets[label] = ("JUMP", inst[1]) if inst[0] == "JUMP" else ("LABEL", pending[0])
+            pending = []
+        for label in pending:
+            targets[label] = ("LABEL", pending[0])
+
+        def resolve(label):
+            seen = set()
+            while label in targets and label not in seen:
+                seen.add(label)
+                kind, target = targets[label]
+                if kind == "LABEL":
+                    return target
+                label = target
+            return label
+
+        mapping = {label: resolve(label) for label in targets}
+        mapping = {label: target for label, target in mapping.items() if label != target}
+        threaded = []
+        for inst in instructions:
+            new = retarget(inst, mapping)
+            if new != inst:
+                self.threaded += 1
+            if new[0] == "IF" and new[2] == new[3]:
+                new = ("JUMP", new[2], "NONE", "NONE")
+            threaded.append(new)
+        return threaded
+
+    def remove_unreachable(self, instructions):
+        cfg = ControlFlowGraph(instructions)
+        reachable = cfg.reachable()
+        kept = [block for block in cfg.blocks if block.index in reachable]
+        self.unreachable += sum(len(block.instructions) for block in cfg.blocks) - sum(
+            len(block.instructions) for block in kept
+        )
+        return [inst for block in kept for inst in block.instructions]
+
+    def remove_jumps_to_next(self, instructions):
+        # BR a b L1; JUMP L2; LABEL L1  ->  BR_inverso a b L2; LABEL L1
+        inverted = []
+        index = 0
+        while index < len(instructions):
+            inst = instructions[index]
+            if (
+                inst[0] in INVERSE_BRANCHES
+                and index + 2 < len(instructions)
+                and instructions[index + 1][0] == "JUMP"
+                and instructions[index + 2] == ("LABEL", inst[3], "NONE", "NONE")
+            ):
+                inverted.append((INVERSE_BRANCHES[inst[0]], inst[1], inst[2], instructions[index + 1][1]))
+                self.jumps += 1
+                index += 2
+                continue
+            inverted.append(inst)
+            index += 1
+        instructions = inverted
+
+        kept = []
+        for index, inst in enumerate(instructions):
+            if inst[0] == "JUMP":
+                # Só labels entre o JUMP e o destino: o salto não muda nada
+                following = index + 1
+                while following < len(instructions) and instructions[following][0] == "LABEL":
+                    if instructions[following][1] == inst[1]:
+                        break
+                    following += 1
+                if following < len(instructions) and instructions[following][1] == inst[1]:
+                    self.jumps += 1
+                    continue
+            kept.append(inst)
+        return kept
+
+    def remove_unused_labels(self, instructions):
+        used = {label for inst in instructions for label in branch_targets(inst)}
+        kept = [inst for inst in instructions if inst[0] != "LABEL" or inst[1] in used]
+        self.labels += len(instructions) - len(kept)
+        return kept
+
+    def remove_dead_stores(self, instructions):
+        # Nada é lido depois do fim do programa. Fica a primeira atribuição de
+        # cada variável no bloco de entrada (a declaração fixa o tipo) e tudo
+        # que poderia levantar erro ou mudar o tipo guardado.
+        types = self.optimizer.infer_types(instructions)
+        cfg = ControlFlowGraph(instructions)
+        liveness = LiveVariables().solve(cfg)
+        declared = set()
+        kept = []
+        for block in cfg.blocks:
+            for inst, live in zip(block.instructions, liveness.live_after(block)):
+                name = instruction_def(inst)
+                if block is cfg.entry and name is not None and name not in declared:
+                    declared.add(name)
+                elif inst[0] in DEFINING_OPS and name not in live and self._removable(inst, types):
+                    self.dead_stores += 1
+                    continue
+                kept.append(inst)
+        return kept
+
+    def _removable(self, inst, types):
+        if not self.optimizer.cannot_fail(inst, types):
+            return False
+        stored = self.optimizer._result_type(inst, types)
+        target = types.get(inst[1])
+        if stored is None or target is None:
+            return False
+        return stored == target or target == "string" or (target == "real" and stored == "integer")
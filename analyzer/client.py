@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+# Só biblioteca padrão: o cliente não importa o compilador, que fica
+# carregado no servidor (main.py serve)
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "pmm-server.sock")
+
+
+def send_request(request, path=DEFAULT_SOCKET):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as reply:
+            return json.loads(reply.readline())
+
+
+def run_remote(path, opt_level=1, engine="reference", socket_path=DEFAULT_SOCKET):
+    # Mesma saída do main.py <arquivo>, mas compilando e executando no servidor
+    if not os.path.exists(path):
+        print(f"Arquivo '{path}' não encontrado.")
+        return 1
+    with open(path, "r", encoding="utf-8") as file:
+        source_code = file.read()
+    if sys.stdin.isatty():
+        print("digite a entrada do programa e termine com Ctrl-D", file=sys.stderr)
+    request = {
+        "op": "run", "source": source_code, "input": sys.stdin.read(),
+        "opt_level": opt_level, "engine": engine,
+    }
+    try:
+        response = send_request(request, socket_path)
+    except (OSError, ValueError) as e:
+        print(f"Servidor indisponível em {socket_path}: {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write(response["output"])
+    if response["ok"]:
+        return 0
+    if response.get("stage") == "compile":
+        print(response["error"])
+        return 0
+    print(f"Erro: {response['error']}", file=sys.stderr)
+    return 1
+
+
+def add_client_arguments(parser):
+    parser.add_argument("arquivo", help="caminho do programa .pas")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"socket Unix (padrão: {DEFAULT_SOCKET})")
+    parser.add_argument(
+        "-O", dest="opt_level", type=int, choices=[0, 1, 2], default=1,
+        help="nível de otimização do código intermediário (padrão: 1)",
+    )
+    parser.add_argument(
+        "--engine", default="reference",
+        help="executor do código intermediário (padrão: reference)",
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m analyzer.client",
+        description="Executa um programa Pascal-- no servidor (main.py serve)",
+    )
+    add_client_arguments(parser)
+    args = parser.parse_args(argv)
+    return run_remote(args.arquivo, args.opt_level, args.engine, args.socket)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
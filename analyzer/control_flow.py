@@ -0,0 +1,499 @@
+import re
+from collections import deque
+
+# Temporários do gerador: "%t" não começa identificador, então um
+# temporário nunca tem o nome de uma variável do programa
+TEMP_PREFIX = "%t"
+TEMP_PATTERN = re.compile(r"%t\d+")
+NAME_PATTERN = re.compile(r"[A-Za-z_]\w*")
+
+BINARY_OPS = {
+    "ADD", "SUB", "MUL", "DIV", "LT", "GT", "LTE", "GTE",
+    "AND", "OR", "EQUALS", "MOD", "INT_DIV",
+}
+
+# Operador relacional -> instrução de desvio fundida. BR_<op> a b L compara
+# a com b: se a comparação for verdadeira segue para a próxima instrução,
+# senão salta para L.
+COMPARE_BRANCHES = {
+    "LT": "BR_LT",
+    "GT": "BR_GT",
+    "LTE": "BR_LTE",
+    "GTE": "BR_GTE",
+    "EQUALS": "BR_EQ",
+}
+
+# Instruções que escrevem no primeiro argumento
+DEFINING_OPS = BINARY_OPS | {"ATT", "NOT"}
+
+# Laço for de variável inteira: FOR_INIT i fim L salta para L se i > fim;
+# FOR_NEXT i fim L soma 1 a i e salta para L enquanto i <= fim
+COUNTED_LOOP_OPS = {"FOR_INIT", "FOR_NEXT"}
+
+# Desvios condicionais com o label no último argumento
+CONDITIONAL_BRANCHES = set(COMPARE_BRANCHES.values()) | COUNTED_LOOP_OPS
+
+
+def temp_name(index):
+    return f"{TEMP_PREFIX}{index}"
+
+
+def is_temp(name):
+    return TEMP_PATTERN.fullmatch(name) is not None
+
+
+def is_variable(arg):
+    return arg != "NONE" and (is_temp(arg) or NAME_PATTERN.fullmatch(arg) is not None)
+
+
+def instruction_uses(inst):
+    op, arg1, arg2, res = inst
+    if op == "ATT":
+        args = [arg2]
+    elif op == "IF":
+        args = [arg1]
+    elif op in ("JUMP", "LABEL"):
+        args = []
+    elif op == "CALL":
+        if arg1 in ("WRITE", "WRITELN"):
+            args = [arg2]
+        elif arg1 == "WRITE2":
+            args = [arg2, res]
+        else:
+            args = []
+    elif op in CONDITIONAL_BRANCHES:
+        args = [arg1, arg2]
+    else:
+        args = [arg2, res]
+    return [arg for arg in args if is_variable(arg)]
+
+
+def instruction_def(inst):
+    op, arg1, arg2, res = inst
+    if op in DEFINING_OPS:
+        return arg1
+    if op == "CALL" and arg1 == "READ":
+        return arg2
+    if op == "FOR_NEXT":
+        return arg1
+    return None
+
+
+def replace_uses(inst, mapping):
+    op, arg1, arg2, res = inst
+    if op == "IF":
+        return (op, mapping.get(arg1, arg1), arg2, res)
+    if op in ("JUMP", "LABEL"):
+        return inst
+    if op == "CALL":
+        if arg1 in ("WRITE", "WRITELN"):
+            return (op, arg1, mapping.get(arg2, arg2), res)
+        if arg1 == "WRITE2":
+            return (op, arg1, mapping.get(arg2, arg2), mapping.get(res, res))
+        return inst
+    if op == "FOR_NEXT":
+        # A variável do laço é lida e escrita: só o limite pode ser trocado
+        return (op, arg1, mapping.get(arg2, arg2), res)
+    if op in CONDITIONAL_BRANCHES:
+        return (op, mapping.get(arg1, arg1), mapping.get(arg2, arg2), res)
+    if op == "ATT":
+        return (op, arg1, mapping.get(arg2, arg2), res)
+    return (op, arg1, mapping.get(arg2, arg2), mapping.get(res, res))
+
+
+def branch_targets(inst):
+    op, arg1, arg2, res = inst
+    if op == "JUMP":
+        return [arg1]
+    if op == "IF":
+        return [arg2, res]
+    if op in CONDITIONAL_BRANCHES:
+        return [res]
+    return []
+
+
+def retarget(inst, mapping):
+    op, arg1, arg2, res = inst
+    if op == "JUMP":
+        return (op, mapping.get(arg1, arg1), arg2, res)
+    if op == "IF":
+        return (op, arg1, mapping.get(arg2, arg2), mapping.get(res, res))
+    if op in CONDITIONAL_BRANCHES:
+        return (op, arg1, arg2, mapping.get(res, res))
+    return inst
+
+
+def ends_block(inst):
+    return inst[0] in ("JUMP", "IF") or inst[0] in CONDITIONAL_BRANCHES
+
+
+def falls_through(inst):
+    return inst[0] not in ("JUMP", "IF")
+
+
+class BasicBlock:
+    def __init__(self, index, instructions):
+        self.index = index
+        self.instructions = instructions
+        self.successors = []
+        self.predecessors = []
+
+    @property
+    def label(self):
+        if self.instructions and self.instructions[0][0] == "LABEL":
+            return self.instructions[0][1]
+        return None
+
+    @property
+    def last(self):
+        return self.instructions[-1] if self.instructions else None
+
+    def __repr__(self):
+        succs = [b.index for b in self.successors]
+        return f"BasicBlock({self.index}, label={self.label}, size={len(self.instructions)}, succs={succs})"
+
+
+class Loop:
+    # Laço natural: cabeçalho + blocos que alcançam uma aresta de retorno
+    # sem passar pelo cabeçalho
+    def __init__(self, header):
+        self.header = header
+        self.blocks = {header.index}
+        self.back_edges = []
+
+    def __contains__(self, block):
+        return block.index in self.blocks
+
+    def __repr__(self):
+        return f"Loop(header={self.header.label}, blocks={sorted(self.blocks)})"
+
+
+class ControlFlowGraph:
+    # Blocos básicos sobre a lista de tuplas: um bloco começa no início do
+    # programa, em cada LABEL e depois de cada desvio
+    def __init__(self, instructions):
+        self.blocks = []
+        self.labels = {}
+        self._split(instructions)
+        self._link()
+
+    def _split(self, instructions):
+        current = []
+        for inst in instructions:
+            if inst[0] == "LABEL" and current:
+                self._add_block(current)
+                current = []
+            current.append(inst)
+            if ends_block(inst):
+                self._add_block(current)
+                current = []
+        if current:
+            self._add_block(current)
+
+    def _add_block(self, instructions):
+        block = BasicBlock(len(self.blocks), instructions)
+        self.blocks.append(block)
+        if block.label is not None:
+            self.labels[block.label] = block
+
+    def _link(self):
+        for block in self.blocks:
+            targets = []
+            last = block.last
+            for label in branch_targets(last):
+                if label in self.labels:
+                    targets.append(self.labels[label])
+            if falls_through(last) and block.index + 1 < len(self.blocks):
+                targets.append(self.blocks[block.index + 1])
+            for target in targets:
+                if target not in block.successors:
+                    block.successors.append(target)
+                    target.predecessors.append(block)
+
+    @property
+    def entry(self):
+        return self.blocks[0] if self.blocks else None
+
+    def instructions(self):
+        return [inst for block in self.blocks for inst in block.instructions]
+
+    def reachable(self):
+        seen = set()
+        stack = [self.entry] if self.blocks else []
+        while stack:
+            block = stack.pop()
+            if block.index in seen:
+                continue
+            seen.add(block.index)
+            stack.extend(block.successors)
+        return seen
+
+    def reverse_postorder(self):
+        # Pós-ordem reversa a partir da entrada; blocos inalcançáveis vêm
+        # depois, cada grupo na sua própria ordem
+        order = []
+        seen = set()
+        for root in self.blocks:
+            if root.index in seen:
+                continue
+            tree = []
+            seen.add(root.index)
+            stack = [(root, iter(root.successors))]
+            while stack:
+                block, successors = stack[-1]
+                for succ in successors:
+                    if succ.index not in seen:
+                        seen.add(succ.index)
+                        stack.append((succ, iter(succ.successors)))
+                        break
+                else:
+                    tree.append(block)
+                    stack.pop()
+            tree.reverse()
+            order.extend(tree)
+        return order
+
+    def immediate_dominators(self):
+        # Algoritmo de Cooper, Harvey e Kennedy sobre a ordem pós-ordem reversa
+        reachable = self.reachable()
+        order = [b for b in self.reverse_postorder() if b.index in reachable]
+        position = {b.index: i for i, b in enumerate(order)}
+        idom = {self.entry.index: self.entry.index} if self.blocks else {}
+
+        def intersect(a, b):
+            while a != b:
+                while position[a] > position[b]:
+                    a = idom[a]
+                while position[b] > position[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for block in order[1:]:
+                preds = [p.index for p in block.predecessors if p.index in idom]
+                if not preds:
+                    continue
+                new_idom = preds[0]
+                for pred in preds[1:]:
+                    new_idom = intersect(pred, new_idom)
+                if idom.get(block.index) != new_idom:
+                    idom[block.index] = new_idom
+                    changed = True
+        return idom
+
+    def dominates(self, idom, a, b):
+        while True:
+            if a == b:
+                return True
+            if b not in idom or idom[b] == b:
+                return False
+            b = idom[b]
+
+    def dominator_intervals(self, idom):
+        # Numeração da árvore de dominadores em profundidade: a domina b se o
+        # intervalo (entrada, saída) de b está dentro do de a. Responde em
+        # tempo constante o que dominates responde subindo a árvore.
+        children = {}
+        for block, parent in idom.items():
+            if block != parent:
+                children.setdefault(parent, []).append(block)
+        intervals = {}
+        clock = 0
+        for root in (index for index, parent in idom.items() if index == parent):
+            stack = [(root, False)]
+            while stack:
+                index, leaving = stack.pop()
+                clock += 1
+                if leaving:
+                    intervals[index] = (intervals[index], clock)
+                    continue
+                intervals[index] = clock
+                stack.append((index, True))
+                stack.extend((child, False) for child in children.get(index, []))
+        return intervals
+
+    def natural_loops(self):
+        idom = self.immediate_dominators()
+        intervals = self.dominator_intervals(idom)
+        loops = {}
+        for block in self.blocks:
+            if block.index not in idom:
+                continue
+            for succ in block.successors:
+                if succ.index not in intervals:
+                    continue
+                (enter, leave), (block_enter, block_leave) = intervals[succ.index], intervals[block.index]
+                if not (enter <= block_enter and block_leave <= leave):
+                    continue
+                loop = loops.setdefault(succ.index, Loop(succ))
+                loop.back_edges.append(block)
+                stack = [block]
+                while stack:
+                    current = stack.pop()
+                    if current.index in loop.blocks:
+                        continue
+                    loop.blocks.add(current.index)
+                    stack.extend(current.predecessors)
+        return list(loops.values())
+
+
+class DataflowAnalysis:
+    # Solver genérico por worklist. Subclasses definem direction ("forward"
+    # ou "backward"), boundary (valor na entrada/saída do programa), initial,
+    # meet e transfer. Os valores devem ser imutáveis (frozenset).
+    direction = "forward"
+
+    def boundary(self):
+        return frozenset()
+
+    def initial(self):
+        return frozenset()
+
+    def meet(self, values):
+        return frozenset().union(*values)
+
+    def transfer(self, block, value):
+        raise NotImplementedError
+
+    def solve(self, cfg):
+        self.cfg = cfg
+        self.block_in = {block.index: self.initial() for block in cfg.blocks}
+        self.block_out = {block.index: self.initial() for block in cfg.blocks}
+        forward = self.direction == "forward"
+        order = cfg.reverse_postorder()
+        if not forward:
+            order.reverse()
+        worklist = deque(order)
+        pending = {block.index for block in order}
+
+        while worklist:
+            block = worklist.popleft()
+            pending.discard(block.index)
+            if forward:
+                values = [self.block_out[p.index] for p in block.predecessors]
+                if block is cfg.entry or not values:
+                    values.append(self.boundary())
+                incoming = self.meet(values)
+                self.block_in[block.index] = incoming
+                result = self.transfer(block, incoming)
+                changed = result != self.block_out[block.index]
+                self.block_out[block.index] = result
+                dependents = block.successors
+            else:
+                values = [self.block_in[s.index] for s in block.successors]
+                if not block.successors:
+                    values.append(self.boundary())
+                outgoing = self.meet(values)
+                self.block_out[block.index] = outgoing
+                result = self.transfer(block, outgoing)
+                changed = result != self.block_in[block.index]
+                self.block_in[block.index] = result
+                dependents = block.predecessors
+            if changed:
+                for dep in dependents:
+                    if dep.index not in pending:
+                        pending.add(dep.index)
+                        worklist.append(dep)
+        return self
+
+
+class LiveVariables(DataflowAnalysis):
+    # Variáveis vivas; exit_live são as vivas no fim do programa
+    direction = "backward"
+
+    def __init__(self, exit_live=()):
+        self.exit_live = frozenset(exit_live)
+
+    def boundary(self):
+        return self.exit_live
+
+    def transfer(self, block, live):
+        for inst in reversed(block.instructions):
+            live = self.step(inst, live)
+        return live
+
+    def step(self, inst, live):
+        name = instruction_def(inst)
+        if name is not None:
+            live = live - {name}
+        return live | frozenset(instruction_uses(inst))
+
+    def live_after(self, block):
+        # Conjunto vivo logo após cada instrução do bloco
+        live = self.block_out[block.index]
+        result = []
+        for inst in reversed(block.instructions):
+            result.append(live)
+            live = self.step(inst, live)
+        result.reverse()
+        return result
+
+
+class ReachingDefinitions(DataflowAnalysis):
+    # Definições identificadas por (índice do bloco, posição no bloco)
+    direction = "forward"
+
+    def solve(self, cfg):
+        self.definitions = {}
+        self.by_variable = {}
+        for block in cfg.blocks:
+            for pos, inst in enumerate(block.instructions):
+                name = instruction_def(inst)
+                if name is not None:
+                    self.definitions[(block.index, pos)] = name
+                    self.by_variable.setdefault(name, set()).add((block.index, pos))
+        return super().solve(cfg)
+
+    def transfer(self, block, reaching):
+        for pos, inst in enumerate(block.instructions):
+            name = instruction_def(inst)
+            if name is not None:
+                reaching = (reaching - self.by_variable[name]) | {(block.index, pos)}
+        return frozenset(reaching)
+
+
+class AvailableExpressions(DataflowAnalysis):
+    # Expressões (op, a, b) já calculadas em todos os caminhos e cujos
+    # operandos não foram redefinidos desde então
+    direction = "forward"
+
+    def solve(self, cfg):
+        self.universe = frozenset(
+            self.expression(inst)
+            for block in cfg.blocks
+            for inst in block.instructions
+            if self.expression(inst) is not None
+        )
+        return super().solve(cfg)
+
+    @staticmethod
+    def expression(inst):
+        op, arg1, arg2, res = inst
+        if op in BINARY_OPS and res != "NONE":
+            return (op, arg2, res)
+        if op == "NOT":
+            return (op, arg2, "NONE")
+        return None
+
+    def initial(self):
+        return self.universe
+
+    def meet(self, values):
+        first, *rest = values
+        return first.intersection(*rest)
+
+    def transfer(self, block, available):
+        for inst in block.instructions:
+            available = self.step(inst, available)
+        return available
+
+    def step(self, inst, available):
+        expr = self.expression(inst)
+        name = instruction_def(inst)
+        if name is not None:
+            available = frozenset(e for e in available if name not in (e[1], e[2]))
+        if expr is not None and name not in (expr[1], expr[2]):
+            available = available | {expr}
+        return available
@@ -1,10 +1,37 @@
+import operator
+import sys
+
+from analyzer.runtime_io import InputReader, OutputBuffer
+
+
 class IntermediateCodeExecutor:
-    def __init__(self, instructions):
+    # Desvios fundidos gerados pelo IROptimizer: seguem em frente se a
+    # comparação for verdadeira, senão saltam para o label
+    COMPARE_BRANCHES = {
+        "BR_LT": operator.lt,
+        "BR_GT": operator.gt,
+        "BR_LTE": operator.le,
+        "BR_GTE": operator.ge,
+        "BR_EQ": operator.eq,
+        # Entrada do for: FOR_INIT i fim L salta para L se i > fim
+        "FOR_INIT": operator.le,
+    }
+
+    def __init__(self, instructions, output=None, input_reader=None, symbols=None):
         self.instructions = instructions
         self.variables = {}  # {nome: {'value': valor, 'type': tipo}}
         self.labels = self._map_labels() 
         self.pc = 0  
-        self.output = "" # Para armazenar a saida e fazer testes depois
+        # Saída bufferizada; também guarda o texto para fazer testes depois
+        self.out = output if output is not None else OutputBuffer(sys.stdout)
+        self.reader = input_reader if input_reader is not None else InputReader(sys.stdin)
+        # Tipos declarados (SemanticAnalysis.symbols) usados para converter o READ
+        self.symbols = symbols or {}
+        self.steps = 0  # instruções executadas
+
+    @property
+    def output(self):
+        return self.out.getvalue()
 
     def _map_labels(self):
         labels = {}
@@ -27,6 +54,12 @@ class IntermediateCodeExecutor:
         else:
             return 'unknown'
 
+    def _write(self, arg):
+        val = self._get_value(arg)
+        if isinstance(val, str):
+            val = val.replace("\\n", "\n")
+        self.out.write(str(val))
+
     def _set_variable(self, var_name, value):
 
         new_type = self._get_type(value)
@@ -52,75 +85,137 @@ class IntermediateCodeExecutor:
 
 
     def run(self):
-        while self.pc < len(self.instructions):
-            op, arg1, arg2, res = self.instructions[self.pc]
-
-            #print(f"\n[{self.pc+1}] Executando: {op}, {arg1}, {arg2}, {res}")
-
-            if op == "ATT":
-                value = self._get_value(arg2)
-                self._set_variable(arg1, value)
-
-            elif op in {"ADD", "SUB", "MUL", "DIV", "LT", "GT", "LTE", "GTE", "AND", "OR", "EQUALS", "MOD", "INT_DIV"}:
-                val1 = self._get_value(arg2)
-                val2 = self._get_value(res)
-                result = self._execute_binary(op, val1, val2)
-                self._set_variable(arg1, result)
-
-            elif op == "NOT":
-                val = self._get_value(arg2)
-                result = int(not val)
-                self._set_variable(arg1, result)
-
-            elif op == "IF":
-                condition = self._get_value(arg1)
-                if condition:
-                    self.pc = self.labels.get(arg2, -1)
-                else:
-                    self.pc = self.labels.get(res, -1)
-                if self.pc == -1:
-                    raise Exception(f"Label não encontrado para IF: {arg2} ou {res}")
-                continue
-
-            elif op == "JUMP":
-                self.pc = self.labels.get(arg1, -1)
-                if self.pc == -1:
-                    raise Exception(f"Label não encontrado para JUMP: {arg1}")
-                continue
-
-            elif op == "CALL":
-                if arg1 == "WRITE":
+        try:
+            self._run()
+        finally:
+            self.out.flush()
+        return self.out.getvalue()
+
+    def _run(self, max_steps=None):
+        # Com max_steps para depois de tantas instruções e devolve False; o
+        # pc fica na próxima instrução, então outro _run continua dali
+        limit = -1 if max_steps is None else max_steps
+        steps = 0
+        try:
+            while self.pc < len(self.instructions):
+                if steps == limit:
+                    return False
+                steps += 1
+                op, arg1, arg2, res = self.instructions[self.pc]
+
+                #print(f"\n[{self.pc+1}] Executando: {op}, {arg1}, {arg2}, {res}")
+
+                if op == "ATT":
+                    value = self._get_value(arg2)
+                    self._set_variable(arg1, value)
+
+                elif op in self.COMPARE_BRANCHES:
+                    val1 = self._get_value(arg1)
+                    val2 = self._get_value(arg2)
+                    if not self.COMPARE_BRANCHES[op](val1, val2):
+                        self.pc = self.labels.get(res, -1)
+                        if self.pc == -1:
+                            raise Exception(f"Label não encontrado para {op}: {res}")
+                        continue
+
+                elif op == "FOR_NEXT":
+                    # Fim do corpo do for: i += 1 e volta para o corpo enquanto
+                    # i <= fim. Só é gerado para variável inteira, então o tipo
+                    # guardado não muda.
+                    counter = self.variables[arg1]
+                    counter['value'] += 1
+                    if counter['value'] <= self._get_value(arg2):
+                        self.pc = self.labels.get(res, -1)
+                        if self.pc == -1:
+                            raise Exception(f"Label não encontrado para {op}: {res}")
+                        continue
+
+                elif op in {"ADD", "SUB", "MUL", "DIV", "LT", "GT", "LTE", "GTE", "AND", "OR", "EQUALS", "MOD", "INT_DIV"}:
+                    val1 = self._get_value(arg2)
+                    val2 = self._get_value(res)
+                    result = self._execute_binary(op, val1, val2)
+                    self._set_variable(arg1, result)
+
+                elif op == "NOT":
                     val = self._get_value(arg2)
-                    if isinstance(val, str):
-                        val = val.replace("\\n", "\n")
-                    print(val, end='')
-                    self.output += str(val)
-                elif arg1 == "READ":
-                    user_input = input()
-                    try:
-                        if self._is_hexadecimal(user_input):
-                            value = self._convert_hexadecimal(user_input)
-                        elif self._is_octal(user_input):
-                            value = self._convert_octal(user_input)
-                        elif '.' in user_input:
-                            value = float(user_input)
-                        else:
-                            value = int(user_input)
-                    except ValueError:
-                        value = user_input
-                    
-                    self._set_variable(arg2, value)
-
-            elif op == "LABEL":
-                pass  
+                    result = int(not val)
+                    self._set_variable(arg1, result)
 
-            else:
-                raise Exception(f"Instrução não reconhecida: {op}")
+                elif op == "IF":
+                    condition = self._get_value(arg1)
+                    if condition:
+                        self.pc = self.labels.get(arg2, -1)
+                    else:
+                        self.pc = self.labels.get(res, -1)
+                    if self.pc == -1:
+                        raise Exception(f"Label não encontrado para IF: {arg2} ou {res}")
+                    continue
+
+                elif op == "JUMP":
+                    self.pc = self.labels.get(arg1, -1)
+                    if self.pc == -1:
+                        raise Exception(f"Label não encontrado para JUMP: {arg1}")
+                    continue
+
+                elif op == "CALL":
+                    if arg1 == "WRITE":
+                        self._write(arg2)
+                    # Superinstruções do IROptimizer: duas escritas num despacho só
+                    elif arg1 == "WRITELN":
+                        self._write(arg2)
+                        self.out.write("\n")
+                    elif arg1 == "WRITE2":
+                        self._write(arg2)
+                        self._write(res)
+                    elif arg1 == "READ":
+                        self.out.flush()
+                        self._set_variable(arg2, self._read_value(arg2))
+
+                elif op == "LABEL":
+                    pass  
+
+                else:
+                    raise Exception(f"Instrução não reconhecida: {op}")
+
+                self.pc += 1
+        finally:
+            self.steps += steps
+        return True
+
+    def _read_value(self, var_name):
+        declared_type = self.symbols.get(var_name)
 
-            self.pc += 1
-        return self.output
+        if declared_type == "STRING":
+            return self.reader.read_line()
+
+        if declared_type in ("INTEGER", "REAL"):
+            token = self.reader.read_token()
+            try:
+                if self._is_hexadecimal(token):
+                    value = int(token, 16)
+                elif self._is_octal(token):
+                    value = int(token, 8)
+                elif declared_type == "INTEGER":
+                    value = int(token)
+                else:
+                    value = float(token)
+            except ValueError:
+                return token  # _set_variable acusa o erro de tipo
+            return float(value) if declared_type == "REAL" else value
+
+        # Sem tipo declarado: tenta adivinhar pelo formato da linha
+        user_input = self.reader.read_line()
+        try:
+            if self._is_hexadecimal(user_input):
+                return self._convert_hexadecimal(user_input)
+            elif self._is_octal(user_input):
+                return self._convert_octal(user_input)
+            elif '.' in user_input:
+                return float(user_input)
+            return int(user_input)
+        except ValueError:
+            return user_input
 
-    
     def _get_value(self, arg):
         if self._is_hexadecimal(arg):
             return self._convert_hexadecimal(arg)
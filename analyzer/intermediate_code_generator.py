@@ -1,9 +1,18 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from analyzer.ast_nodes import BinaryOpNode, UnaryOpNode
+from analyzer.control_flow import temp_name
 
 
 class IntermediateCodeGenerator:
-    def __init__(self):
+    def __init__(self, symbols=None):
         self.instructions: List[Tuple[str, str, str, str]] = []
+        # (linha, coluna) no fonte de cada instrução, na mesma ordem
+        self.spans: List[Optional[Tuple[int, int]]] = []
+        self.span = None
+        # Tipos declarados (SemanticAnalysis.symbols); com eles o for de
+        # variável inteira usa FOR_INIT/FOR_NEXT
+        self.symbols = symbols or {}
         self.temp_count = 0
         self.label_count = 0
         self.loop_start_labels = []  
@@ -11,7 +20,7 @@ class IntermediateCodeGenerator:
 
     def new_temp(self) -> str:
         self.temp_count += 1
-        return f"T{self.temp_count}"
+        return temp_name(self.temp_count)
 
     def new_label(self) -> str:
         self.label_count += 1
@@ -19,15 +28,27 @@ class IntermediateCodeGenerator:
 
     def emit(self, op: str, arg1: str, arg2: str, result: str):
         self.instructions.append((op, arg1, arg2, result))
+        self.spans.append(self.span)
 
-    def print_instructions(self):
-        for idx, inst in enumerate(self.instructions, start=1):
+    def print_instructions(self, instructions=None):
+        if instructions is None:
+            instructions = self.instructions
+        for idx, inst in enumerate(instructions, start=1):
             print(f"{idx:02} - {inst}")
 
     def generate_from_ast(self, node):
         method = "gen_" + node.__class__.__name__
         visitor = getattr(self, method, self.generic_gen)
-        return visitor(node)
+        if getattr(node, "line", None) is None:
+            return visitor(node)
+        # Instruções emitidas depois dos filhos (salto de volta do while,
+        # FOR_NEXT) ficam com a posição do próprio comando
+        outer = self.span
+        self.span = (node.line, node.column)
+        try:
+            return visitor(node)
+        finally:
+            self.span = outer
 
     def generic_gen(self, node):
         if not hasattr(node, "__dict__"):
@@ -49,6 +70,9 @@ class IntermediateCodeGenerator:
         if node.var_type == "STRING":
             for identifier in node.identifiers:
                 self.emit("ATT", identifier.name, '""', "NONE")
+        elif node.var_type == "REAL":
+            for identifier in node.identifiers:
+                self.emit("ATT", identifier.name, "0.0", "NONE")
         else:
             for identifier in node.identifiers:
                 self.emit("ATT", identifier.name, "0", "NONE")
@@ -82,12 +106,27 @@ class IntermediateCodeGenerator:
         self.emit(node.op, temp, expr, "NONE")
         return temp
 
+    def gen_condition(self, node, true_label, false_label):
+        # AND/OR/NOT em condições viram saltos (curto-circuito), sem temporários
+        if isinstance(node, BinaryOpNode) and node.op in ("AND", "OR"):
+            right_label = self.new_label()
+            if node.op == "AND":
+                self.gen_condition(node.left, right_label, false_label)
+            else:
+                self.gen_condition(node.left, true_label, right_label)
+            self.emit("LABEL", right_label, "NONE", "NONE")
+            self.gen_condition(node.right, true_label, false_label)
+        elif isinstance(node, UnaryOpNode) and node.op == "NOT":
+            self.gen_condition(node.expr, false_label, true_label)
+        else:
+            cond_temp = self.generate_from_ast(node)
+            self.emit("IF", cond_temp, true_label, false_label)
+
     def gen_IfNode(self, node):
-        cond_temp = self.generate_from_ast(node.condition)
         true_label = self.new_label()
         false_label = self.new_label()
         end_label = self.new_label()
-        self.emit("IF", cond_temp, true_label, false_label)
+        self.gen_condition(node.condition, true_label, false_label)
         self.emit("LABEL", true_label, "NONE", "NONE")
         self.generate_from_ast(node.then_stmt)
         self.emit("JUMP", end_label, "NONE", "NONE")
@@ -103,8 +142,7 @@ class IntermediateCodeGenerator:
         self.loop_start_labels.append(start_label)
         self.loop_end_labels.append(end_label)
         self.emit("LABEL", start_label, "NONE", "NONE")
-        cond_temp = self.generate_from_ast(node.condition)
-        self.emit("IF", cond_temp, true_label, end_label)
+        self.gen_condition(node.condition, true_label, end_label)
         self.emit("LABEL", true_label, "NONE", "NONE")
         self.generate_from_ast(node.stmt)
         self.emit("JUMP", start_label, "NONE", "NONE")
@@ -122,15 +160,22 @@ class IntermediateCodeGenerator:
         self.loop_start_labels.append(start_label)
         self.loop_end_labels.append(end_label)
         self.emit("LABEL", start_label, "NONE", "NONE")
-        temp = self.new_temp()
-        self.emit("LTE", temp, var_name, end_value)
-        self.emit("IF", temp, body_label, end_label)
+        counted = self.symbols.get(var_name) == "INTEGER"
+        if counted:
+            self.emit("FOR_INIT", var_name, end_value, end_label)
+        else:
+            temp = self.new_temp()
+            self.emit("LTE", temp, var_name, end_value)
+            self.emit("IF", temp, body_label, end_label)
         self.emit("LABEL", body_label, "NONE", "NONE")
         self.generate_from_ast(node.stmt)
-        temp2 = self.new_temp()
-        self.emit("ADD", temp2, var_name, "1")
-        self.emit("ATT", var_name, temp2, "NONE")
-        self.emit("JUMP", start_label, "NONE", "NONE")
+        if counted:
+            self.emit("FOR_NEXT", var_name, end_value, body_label)
+        else:
+            temp2 = self.new_temp()
+            self.emit("ADD", temp2, var_name, "1")
+            self.emit("ATT", var_name, temp2, "NONE")
+            self.emit("JUMP", start_label, "NONE", "NONE")
         self.emit("LABEL", end_label, "NONE", "NONE")
         self.loop_start_labels.pop()
         self.loop_end_labels.pop()
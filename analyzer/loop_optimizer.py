@@ -0,0 +1,313 @@
+import re
+
+from analyzer.control_flow import (
+    DEFINING_OPS,
+    TEMP_PREFIX,
+    BasicBlock,
+    ControlFlowGraph,
+    falls_through,
+    instruction_def,
+    instruction_uses,
+    is_temp,
+    replace_uses,
+    retarget,
+    temp_name,
+)
+
+
+class LoopOptimizer:
+    # Otimizações de laço sobre os laços naturais do CFG: move cálculos
+    # invariantes para um pré-cabeçalho e troca multiplicações por variáveis
+    # de indução por somas
+    def __init__(self, optimizer):
+        self.optimizer = optimizer  # IROptimizer: constantes e tipos
+        self.hoisted = 0
+        self.reduced = 0
+
+    def optimize(self, instructions):
+        # CFG, dominadores, laços, tipos e contagens são calculados uma vez;
+        # cada laço transformado troca as instruções dos seus blocos e
+        # atualiza as contagens só desses blocos
+        cfg = ControlFlowGraph(instructions)
+        self.blocks = list(cfg.blocks)  # e os pré-cabeçalhos, com índice próprio
+        self.preheaders = {}  # índice do cabeçalho -> bloco do pré-cabeçalho
+        self.types = self.optimizer.infer_types(instructions)
+        self.uses = {}
+        self.def_counts = {}
+        self.use_blocks = {}  # variável -> {índice do bloco: usos}
+        for block in cfg.blocks:
+            self._count(block, 1)
+        self.last_label = self._highest("L", instructions)
+        self.last_temp = self._highest(TEMP_PREFIX, instructions)
+
+        loops = [loop for loop in cfg.natural_loops() if loop.header.label is not None]
+        # Laços internos primeiro: o que sai deles ainda pode sair do externo
+        for loop in sorted(loops, key=lambda l: len(l.blocks)):
+            self._optimize_loop(cfg, loop)
+
+        result = []
+        for block in cfg.blocks:
+            if block.index in self.preheaders:
+                result.extend(self.preheaders[block.index].instructions)
+            result.extend(block.instructions)
+        return result
+
+    def _highest(self, prefix, instructions):
+        pattern = re.compile(re.escape(prefix) + r"(\d+)")
+        highest = 0
+        for inst in instructions:
+            for arg in inst[1:]:
+                match = pattern.fullmatch(arg)
+                if match:
+                    highest = max(highest, int(match.group(1)))
+        return highest
+
+    def _fresh_label(self):
+        self.last_label += 1
+        return f"L{self.last_label}"
+
+    def _fresh_temp(self):
+        self.last_temp += 1
+        return temp_name(self.last_temp)
+
+    def _count(self, block, sign):
+        # Soma (sign 1) ou desconta (sign -1) as definições e usos do bloco
+        for inst in block.instructions:
+            name = instruction_def(inst)
+            if name is not None:
+                self.def_counts[name] = self.def_counts.get(name, 0) + sign
+            for used in instruction_uses(inst):
+                self.uses[used] = self.uses.get(used, 0) + sign
+                per_block = self.use_blocks.setdefault(used, {})
+                per_block[block.index] = per_block.get(block.index, 0) + sign
+                if not per_block[block.index]:
+                    del per_block[block.index]
+
+    def _is_constant(self, arg):
+        return self.optimizer.constant_value(arg)[0]
+
+    def _int_constant(self, arg):
+        is_constant, value = self.optimizer.constant_value(arg)
+        if is_constant and type(value) is int:
+            return value
+        return None
+
+    def _has_preheader_slot(self, cfg, loop):
+        header = loop.header
+        outside = [p for p in header.predecessors if p not in loop]
+        if not outside:
+            return False
+        # O bloco anterior no código não pode cair no cabeçalho vindo de dentro
+        # do laço, senão passaria pelo pré-cabeçalho a cada volta. Blocos que
+        # ficaram vazios (tudo içado) não contam.
+        index = header.index - 1
+        while index >= 0 and not cfg.blocks[index].instructions:
+            index -= 1
+        if index >= 0:
+            previous = cfg.blocks[index]
+            if previous in loop and falls_through(previous.last):
+                return False
+        return True
+
+    def _loop_blocks(self, loop):
+        # Blocos do laço na ordem do código, com os pré-cabeçalhos dos laços
+        # internos já tratados antes dos seus cabeçalhos
+        blocks = []
+        for index in sorted(loop.blocks):
+            if index in self.preheaders and index != loop.header.index:
+                blocks.append(self.preheaders[index])
+            blocks.append(self.blocks[index])
+        return blocks
+
+    def _optimize_loop(self, cfg, loop):
+        if not self._has_preheader_slot(cfg, loop):
+            return
+
+        loop_blocks = self._loop_blocks(loop)
+        members = {block.index for block in loop_blocks}
+        loop_defs = set()
+        for block in loop_blocks:
+            for inst in block.instructions:
+                name = instruction_def(inst)
+                if name is not None:
+                    loop_defs.add(name)
+
+        hoisted = self._find_invariants(loop_blocks, members, loop_defs)
+        steps = self._induction_steps(loop_blocks)
+        reductions = self._find_reductions(loop_blocks, hoisted, steps, loop_defs)
+        if not hoisted and not reductions:
+            return
+
+        order = {block.index: position for position, block in enumerate(loop_blocks)}
+        preheader_label = self._fresh_label()
+        preheader = [("LABEL", preheader_label, "NONE", "NONE")]
+        preheader += [
+            self.blocks[index].instructions[pos]
+            for index, pos in sorted(hoisted, key=lambda site: (order[site[0]], site[1]))
+        ]
+
+        updates = {}  # variável de indução -> instruções que mantêm as reduzidas
+        replaced = {}  # (bloco, posição) -> variável reduzida
+        for (var, factor), (slot, sites) in reductions.items():
+            preheader.append(("MUL", slot, var, factor))
+            updates.setdefault(var, []).append(self._increment(slot, factor, steps[var]))
+            for site in sites:
+                replaced[site] = slot
+
+        rewritten = [self._rewrite_block(block, hoisted, replaced, updates) for block in loop_blocks]
+        for block, instructions in zip(loop_blocks, rewritten):
+            self._count(block, -1)
+            block.instructions = instructions
+            self._count(block, 1)
+        block = BasicBlock(len(self.blocks), preheader)
+        self.blocks.append(block)
+        self.preheaders[loop.header.index] = block
+        self._count(block, 1)
+        # Quem entrava no laço por fora passa a entrar pelo pré-cabeçalho
+        for pred in loop.header.predecessors:
+            if pred not in loop:
+                pred.instructions = [retarget(inst, {loop.header.label: preheader_label}) for inst in pred.instructions]
+
+        self.hoisted += len(hoisted)
+        self.reduced += len(replaced)
+
+    def _find_invariants(self, loop_blocks, members, loop_defs):
+        # Temporários definidos uma única vez, usados só dentro do laço, com
+        # operandos que não mudam no laço. O pré-cabeçalho roda mesmo quando o
+        # corpo não rodaria, então só sobem operações que não levantam erro.
+        invariant = set()
+        sites = set()
+        changed = True
+        while changed:
+            changed = False
+            for block in loop_blocks:
+                for pos, inst in enumerate(block.instructions):
+                    op, dest, left, right = inst
+                    if (block.index, pos) in sites or op not in DEFINING_OPS:
+                        continue
+                    if not is_temp(dest) or self.def_counts.get(dest) != 1:
+                        continue
+                    if not self.use_blocks.get(dest, {}).keys() <= members:
+                        continue
+                    operands = [left] if op in ("ATT", "NOT") else [left, right]
+                    if not all(
+                        arg in invariant or (arg not in loop_defs and self._operand_type(arg) is not None)
+                        for arg in operands
+                    ):
+                        continue
+                    if not self.optimizer.cannot_fail(inst, self.types):
+                        continue
+                    invariant.add(dest)
+                    sites.add((block.index, pos))
+                    changed = True
+        return sites
+
+    def _operand_type(self, arg):
+        return self.optimizer._operand_type(arg, self.types)
+
+    def _induction_steps(self, loop_blocks):
+        # Variáveis de indução básicas: inteiras e alteradas no laço só por
+        # ADD i i c, com c constante inteira (e o mesmo c em todo o laço), ou
+        # pelo FOR_NEXT do for, que soma 1
+        steps = {}
+        disqualified = set()
+        for block in loop_blocks:
+            for inst in block.instructions:
+                name = instruction_def(inst)
+                if name is None:
+                    continue
+                step = self._step(inst)
+                if step is None or is_temp(name) or self.types.get(name) != "integer":
+                    disqualified.add(name)
+                elif steps.setdefault(name, step) != step:
+                    disqualified.add(name)
+        return {name: step for name, step in steps.items() if name not in disqualified}
+
+    def _step(self, inst):
+        op, dest, left, right = inst
+        if op == "FOR_NEXT":
+            return 1
+        if op != "ADD":
+            return None
+        if left == dest:
+            return self._int_constant(right)
+        if right == dest:
+            return self._int_constant(left)
+        return None
+
+    def _find_reductions(self, loop_blocks, hoisted, steps, loop_defs):
+        # Cada MUL T i k vira uma variável S mantida igual a i*k: S recebe
+        # i*k no pré-cabeçalho e soma c*k a cada ADD i i c do laço. k pode ser
+        # constante ou, com passo 1 ou -1, uma variável inteira invariante.
+        reductions = {}
+        for block in loop_blocks:
+            for pos, inst in enumerate(block.instructions):
+                op, dest, left, right = inst
+                if op != "MUL" or (block.index, pos) in hoisted:
+                    continue
+                if not is_temp(dest) or self.def_counts.get(dest) != 1:
+                    continue
+                if left in steps and self._is_factor(right, steps[left], loop_defs):
+                    key = (left, right)
+                elif right in steps and self._is_factor(left, steps[right], loop_defs):
+                    key = (right, left)
+                else:
+                    continue
+                if key not in reductions:
+                    slot = self._fresh_temp()
+                    self.types[slot] = "integer"
+                    reductions[key] = (slot, [])
+                reductions[key][1].append((block.index, pos))
+        return reductions
+
+    def _is_factor(self, arg, step, loop_defs):
+        if self._int_constant(arg) is not None:
+            return True
+        return (
+            step in (1, -1)
+            and not is_temp(arg)
+            and arg not in loop_defs
+            and self.types.get(arg) == "integer"
+        )
+
+    def _increment(self, slot, factor, step):
+        constant = self._int_constant(factor)
+        if constant is not None:
+            return ("ADD", slot, slot, str(step * constant))
+        return ("ADD" if step == 1 else "SUB", slot, slot, factor)
+
+    def _rewrite_block(self, block, hoisted, replaced, updates):
+        code = block.instructions
+        rewritten = []
+        renames = {}
+        for pos, inst in enumerate(code):
+            if (block.index, pos) in hoisted:
+                continue
+            inst = replace_uses(inst, renames)
+            if (block.index, pos) in replaced:
+                slot = replaced[(block.index, pos)]
+                if self._can_substitute(code, pos, inst[1], updates):
+                    renames[inst[1]] = slot
+                else:
+                    rewritten.append(("ATT", inst[1], slot, "NONE"))
+                continue
+            if inst[0] == "FOR_NEXT":
+                # O FOR_NEXT termina o bloco: a reduzida anda antes dele
+                rewritten.extend(updates.get(instruction_def(inst), []))
+                rewritten.append(inst)
+                continue
+            rewritten.append(inst)
+            rewritten.extend(updates.get(instruction_def(inst), []))
+        return rewritten
+
+    def _can_substitute(self, code, pos, temp, updates):
+        # Os usos de T podem ler direto a variável reduzida se estão todos
+        # neste bloco antes da próxima alteração da variável de indução
+        found = 0
+        for inst in code[pos + 1:]:
+            if inst[0] == "FOR_NEXT" and inst[1] in updates:
+                break
+            found += instruction_uses(inst).count(temp)
+            if instruction_def(inst) in updates:
+                break
+        return found == self.uses.get(temp, 0)
@@ -0,0 +1,73 @@
+import fnmatch
+import json
+import os
+import tracemalloc
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Alocações do próprio tracemalloc (e do fnmatch dos filtros) e do import
+# não interessam
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, fnmatch.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryProfile:
+    # Mesma interface do PipelineTimings (stage e count), mas medindo memória
+    # com tracemalloc: pico durante a etapa, quanto ficou retido no fim dela e
+    # os pontos do código que mais alocaram o que ficou retido
+    def __init__(self, top=10):
+        self.top = top
+        self.stages = {}
+        self.counters = {}
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        before = tracemalloc.take_snapshot().filter_traces(IGNORED)
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(IGNORED)
+            self.stages[name] = {
+                "peak_bytes": peak - start,
+                "retained_bytes": current - start,
+                "top_sites": self._top_sites(after.compare_to(before, "lineno")),
+            }
+
+    def _top_sites(self, differences):
+        sites = []
+        for stat in differences[:self.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            filename = frame.filename
+            if filename.startswith(ROOT + os.sep):
+                filename = os.path.relpath(filename, ROOT)
+            sites.append({"site": f"{filename}:{frame.lineno}", "bytes": stat.size_diff, "count": stat.count_diff})
+        return sites
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def to_dict(self):
+        return {
+            "stages": self.stages,
+            "peak_bytes": max((stage["peak_bytes"] for stage in self.stages.values()), default=0),
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, **extra):
+        return json.dumps({**extra, **self.to_dict()}, ensure_ascii=False, indent=2)
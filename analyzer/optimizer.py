@@ -0,0 +1,460 @@
+from analyzer.cleanup import CodeCleaner
+from analyzer.control_flow import (
+    BINARY_OPS,
+    COMPARE_BRANCHES,
+    DEFINING_OPS,
+    ControlFlowGraph,
+    LiveVariables,
+    instruction_def,
+    instruction_uses,
+    is_temp,
+    replace_uses,
+    temp_name,
+)
+from analyzer.execute import IntermediateCodeExecutor
+from analyzer.loop_optimizer import LoopOptimizer
+
+COMMUTATIVE_OPS = {"ADD", "MUL", "AND", "OR", "EQUALS"}
+
+
+class IROptimizer:
+    # Nível 0: sem otimizações
+    # Nível 1: dobramento/propagação de constantes, propagação de cópias,
+    #          remoção de temporários mortos, desvios fundidos e limpeza
+    #          (código inalcançável, saltos e atribuições mortas)
+    # Nível 2: nível 1 + numeração de valores local (subexpressões comuns),
+    #          otimizações de laço (invariantes e redução de força) e
+    #          reaproveitamento de temporários por vivacidade
+    def __init__(self, level=1):
+        self.level = level
+        self.stats = {}
+        # Usado só para avaliar constantes com a mesma semântica da execução
+        self._evaluator = IntermediateCodeExecutor([])
+
+    def optimize(self, instructions):
+        instructions = list(instructions)
+        self.stats["instructions_before"] = len(instructions)
+        if self.level >= 1:
+            instructions = self.fold_constants(instructions)
+            instructions = self.propagate_copies(instructions)
+            if self.level >= 2:
+                instructions = self.number_values(instructions)
+            instructions = self.eliminate_dead_temps(instructions)
+            if self.level >= 2:
+                instructions = self.optimize_loops(instructions)
+            instructions = self.fuse_branches(instructions)
+            instructions = self.clean_up(instructions)
+            instructions = self.fuse_superinstructions(instructions)
+        if self.level >= 2:
+            instructions = self.allocate_temps(instructions)
+        self.stats["instructions_after"] = len(instructions)
+        return instructions
+
+    def _count_uses(self, instructions):
+        uses = {}
+        for inst in instructions:
+            for name in instruction_uses(inst):
+                uses[name] = uses.get(name, 0) + 1
+        return uses
+
+    def constant_value(self, arg):
+        # Retorna (True, valor) se o argumento é um literal, com o mesmo valor
+        # que _get_value produziria na execução
+        ev = self._evaluator
+        is_literal = (
+            ev._is_hexadecimal(arg)
+            or ev._is_octal(arg)
+            or arg.isdigit()
+            or (arg.startswith("-") and arg[1:].isdigit())
+            or ev._is_float(arg)
+            or (len(arg) >= 2 and arg[0] == arg[-1] and arg[0] in "\"'")
+        )
+        if not is_literal:
+            return False, None
+        try:
+            return True, ev._get_value(arg)
+        except Exception:
+            return False, None
+
+    def encode_constant(self, value):
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            text = str(value)
+        elif isinstance(value, float):
+            text = repr(value)
+        elif isinstance(value, str):
+            text = f'"{value}"'
+        else:
+            return None
+        is_constant, decoded = self.constant_value(text)
+        if is_constant and type(decoded) is type(value) and decoded == value:
+            return text
+        return None
+
+    def _stored_value(self, runtime_type, value):
+        # Valor que _set_variable guardaria numa variável do tipo dado
+        new_type = self._evaluator._get_type(value)
+        if runtime_type == "string":
+            return str(value)
+        if runtime_type == "real" and new_type == "integer":
+            return float(value)
+        if runtime_type == new_type:
+            return value
+        return None
+
+    def _entry_types(self, cfg):
+        # O bloco de entrada roda primeiro: a primeira atribuição constante de
+        # cada variável ali (as declarações) fixa o tipo dela na execução
+        types = {}
+        for op, arg1, arg2, res in cfg.entry.instructions if cfg.blocks else []:
+            name = instruction_def((op, arg1, arg2, res))
+            if name is None or name in types:
+                continue
+            is_constant, value = self.constant_value(arg2) if op == "ATT" else (False, None)
+            types[name] = self._evaluator._get_type(value) if is_constant else None
+        return types
+
+    def fold_constants(self, instructions):
+        cfg = ControlFlowGraph(instructions)
+        runtime_types = self._entry_types(cfg)
+        count = 0
+        for block in cfg.blocks:
+            known = {}  # variável -> literal com o valor que ela guarda
+            folded = []
+            for inst in block.instructions:
+                inst = replace_uses(inst, known)
+                op, arg1, arg2, res = inst
+
+                if op in BINARY_OPS or op == "NOT":
+                    left_constant, left = self.constant_value(arg2)
+                    right_constant, right = self.constant_value(res) if op != "NOT" else (True, None)
+                    if left_constant and right_constant:
+                        try:
+                            if op == "NOT":
+                                value = int(not left)
+                            else:
+                                value = self._evaluator._execute_binary(op, left, right)
+                        except Exception:
+                            value = None
+                        text = self.encode_constant(value) if value is not None else None
+                        if text is not None:
+                            inst = ("ATT", arg1, text, "NONE")
+                            op, arg1, arg2, res = inst
+                            count += 1
+
+                elif op == "IF":
+                    is_constant, value = self.constant_value(arg1)
+                    if is_constant:
+                        folded.append(("JUMP", arg2 if value else res, "NONE", "NONE"))
+                        count += 1
+                        continue
+
+                elif op in self._evaluator.COMPARE_BRANCHES:
+                    left_constant, left = self.constant_value(arg1)
+                    right_constant, right = self.constant_value(arg2)
+                    if left_constant and right_constant:
+                        try:
+                            taken = not self._evaluator.COMPARE_BRANCHES[op](left, right)
+                        except Exception:
+                            taken = None
+                        if taken is not None:
+                            if taken:
+                                folded.append(("JUMP", res, "NONE", "NONE"))
+                            count += 1
+                            continue
+
+                name = instruction_def(inst)
+                if name is not None:
+                    known.pop(name, None)
+                    if op == "ATT":
+                        is_constant, value = self.constant_value(arg2)
+                        runtime_type = "temp" if is_temp(name) else runtime_types.get(name)
+                        if is_constant and runtime_type is not None:
+                            stored = value if runtime_type == "temp" else self._stored_value(runtime_type, value)
+                            text = self.encode_constant(stored) if stored is not None else None
+                            if text is not None:
+                                known[name] = text
+
+                folded.append(inst)
+            block.instructions = folded
+
+        self.stats["folded_constants"] = count
+        return cfg.instructions()
+
+    def propagate_copies(self, instructions):
+        # OP T a b; ATT x T  ->  OP x a b, quando T não tem outro uso
+        uses = self._count_uses(instructions)
+        cfg = ControlFlowGraph(instructions)
+        count = 0
+        for block in cfg.blocks:
+            code = block.instructions
+            propagated = []
+            i = 0
+            while i < len(code):
+                op, arg1, arg2, res = code[i]
+                if op in DEFINING_OPS and is_temp(arg1) and uses.get(arg1) == 1 and i + 1 < len(code):
+                    next_op, target, source, _ = code[i + 1]
+                    if next_op == "ATT" and source == arg1 and target != arg1:
+                        propagated.append((op, target, arg2, res))
+                        count += 1
+                        i += 2
+                        continue
+                propagated.append(code[i])
+                i += 1
+            block.instructions = propagated
+        self.stats["propagated_copies"] = count
+        return cfg.instructions()
+
+    def _expression_key(self, inst, types):
+        op, _, left, right = inst
+        if op == "NOT":
+            return (op, left)
+        # Com operandos numéricos a ordem não importa (ADD de strings concatena)
+        if op in COMMUTATIVE_OPS and left > right and all(
+            self._operand_type(arg, types) in ("integer", "real") for arg in (left, right)
+        ):
+            left, right = right, left
+        return (op, left, right)
+
+    def number_values(self, instructions):
+        # Numeração de valores por bloco: OP T a b repetido, sem redefinição
+        # de a ou b no meio, passa a usar o temporário que já tem o valor.
+        # Os dois temporários precisam ter definição única, assim o que fica
+        # nunca muda e pode substituir o outro no programa inteiro.
+        types = self.infer_types(instructions)
+        def_counts = {}
+        for inst in instructions:
+            name = instruction_def(inst)
+            if name is not None:
+                def_counts[name] = def_counts.get(name, 0) + 1
+
+        cfg = ControlFlowGraph(instructions)
+        renames = {}
+        for block in cfg.blocks:
+            available = {}  # (op, operandos) -> temporário com o valor
+            numbered = []
+            for inst in block.instructions:
+                inst = replace_uses(inst, renames)
+                op, dest = inst[0], inst[1]
+                key = None
+                if (op in BINARY_OPS or op == "NOT") and is_temp(dest) and def_counts.get(dest) == 1:
+                    key = self._expression_key(inst, types)
+                    if key in available:
+                        renames[dest] = available[key]
+                        continue
+                name = instruction_def(inst)
+                if name is not None:
+                    available = {k: t for k, t in available.items() if name not in k[1:]}
+                if key is not None and dest not in key[1:]:
+                    available[key] = dest
+                numbered.append(inst)
+            block.instructions = numbered
+
+        self.stats["cse_eliminated"] = len(renames)
+        return [replace_uses(inst, renames) for inst in cfg.instructions()]
+
+    def eliminate_dead_temps(self, instructions):
+        # Remove definições de temporários que nunca são lidos; repete porque
+        # cada remoção pode deixar outros temporários sem uso
+        count = 0
+        while True:
+            uses = self._count_uses(instructions)
+            live = [
+                inst for inst in instructions
+                if not (inst[0] in DEFINING_OPS and is_temp(inst[1]) and not uses.get(inst[1]))
+            ]
+            if len(live) == len(instructions):
+                break
+            count += len(instructions) - len(live)
+            instructions = live
+        self.stats["dead_temps"] = count
+        return instructions
+
+    def optimize_loops(self, instructions):
+        loops = LoopOptimizer(self)
+        instructions = loops.optimize(instructions)
+        self.stats["hoisted"] = loops.hoisted
+        self.stats["strength_reduced"] = loops.reduced
+        return instructions
+
+    def clean_up(self, instructions):
+        cleaner = CodeCleaner(self)
+        instructions = cleaner.clean(instructions)
+        self.stats["unreachable_removed"] = cleaner.unreachable
+        self.stats["jumps_threaded"] = cleaner.threaded
+        self.stats["labels_removed"] = cleaner.labels
+        self.stats["jumps_removed"] = cleaner.jumps
+        self.stats["dead_stores"] = cleaner.dead_stores
+        return instructions
+
+    def fuse_branches(self, instructions):
+        # REL T a b; IF T Lv Lf  ->  BR_REL a b Lf (+ JUMP Lv se Lv não vier em seguida)
+        uses = self._count_uses(instructions)
+        cfg = ControlFlowGraph(instructions)
+        count = 0
+        for block in cfg.blocks:
+            code = block.instructions
+            if len(code) < 2:
+                continue
+            op, temp, left, right = code[-2]
+            branch, cond, true_label, false_label = code[-1]
+            if (
+                op in COMPARE_BRANCHES
+                and branch == "IF"
+                and cond == temp
+                and is_temp(temp)
+                and uses.get(temp) == 1
+            ):
+                fused = [(COMPARE_BRANCHES[op], left, right, false_label)]
+                next_block = cfg.blocks[block.index + 1] if block.index + 1 < len(cfg.blocks) else None
+                if next_block is None or next_block.label != true_label:
+                    fused.append(("JUMP", true_label, "NONE", "NONE"))
+                block.instructions = code[:-2] + fused
+                count += 1
+        self.stats["fused_branches"] = count
+        return cfg.instructions()
+
+    def fuse_superinstructions(self, instructions):
+        # Sequências mais comuns no corpus (python -m analyzer.superinstructions):
+        # CALL WRITE x; CALL WRITE "\n"  ->  CALL WRITELN x
+        # CALL WRITE a; CALL WRITE b     ->  CALL WRITE2 a b
+        # Um LABEL entre as duas impede a fusão, já que pode haver salto para ele
+        fused = []
+        count = 0
+        i = 0
+        while i < len(instructions):
+            inst = instructions[i]
+            following = instructions[i + 1] if i + 1 < len(instructions) else None
+            if inst[:2] == ("CALL", "WRITE") and following is not None and following[:2] == ("CALL", "WRITE"):
+                if following[2] == "\\n":
+                    fused.append(("CALL", "WRITELN", inst[2], "NONE"))
+                else:
+                    fused.append(("CALL", "WRITE2", inst[2], following[2]))
+                count += 1
+                i += 2
+                continue
+            fused.append(inst)
+            i += 1
+        self.stats["superinstructions"] = count
+        return fused
+
+    def _operand_type(self, arg, types):
+        is_constant, value = self.constant_value(arg)
+        if is_constant:
+            return self._evaluator._get_type(value)
+        return types.get(arg)
+
+    def cannot_fail(self, inst, types):
+        # Operações que nunca levantam erro na execução: podem ser movidas ou
+        # removidas sem mudar o comportamento do programa
+        op, _, left, right = inst
+        if op == "ATT":
+            return True
+        operands = [left] if op == "NOT" else [left, right]
+        if not all(self._operand_type(arg, types) in ("integer", "real") for arg in operands):
+            return False
+        if op in ("DIV", "MOD", "INT_DIV"):
+            is_constant, divisor = self.constant_value(right)
+            return is_constant and divisor != 0
+        return True
+
+    def _result_type(self, inst, types):
+        op, arg1, arg2, res = inst
+        if op == "ATT":
+            return self._operand_type(arg2, types)
+        if op in ("LT", "GT", "LTE", "GTE", "EQUALS", "AND", "OR", "NOT"):
+            return "integer"
+        left = self._operand_type(arg2, types)
+        right = self._operand_type(res, types)
+        numeric = ("integer", "real")
+        if op == "ADD" and left == right == "string":
+            return "string"
+        if left not in numeric or right not in numeric:
+            return None
+        if op == "DIV" or "real" in (left, right):
+            return "real"
+        return "integer"
+
+    def infer_types(self, instructions):
+        # Tipo de execução de cada variável: as do usuário pelo bloco de
+        # entrada, os temporários pelo valor que recebem. None quando não dá
+        # para garantir um tipo único.
+        types = {
+            name: var_type
+            for name, var_type in self._entry_types(ControlFlowGraph(instructions)).items()
+            if not is_temp(name)
+        }
+        conflicting = set()
+        for inst in instructions:
+            name = instruction_def(inst)
+            if name is None or not is_temp(name):
+                continue
+            result = self._result_type(inst, types)
+            if name in types and types[name] != result:
+                conflicting.add(name)
+            types[name] = result
+        for name in conflicting:
+            types[name] = None
+        return types
+
+    def allocate_temps(self, instructions):
+        # Coloração gulosa do grafo de interferência dos temporários, separada
+        # por tipo: _set_variable fixa o tipo do primeiro valor guardado, então
+        # só temporários do mesmo tipo podem dividir um slot
+        types = self.infer_types(instructions)
+        cfg = ControlFlowGraph(instructions)
+        liveness = LiveVariables().solve(cfg)
+
+        order = []
+        interference = {}
+        for block in cfg.blocks:
+            for inst, live in zip(block.instructions, liveness.live_after(block)):
+                name = instruction_def(inst)
+                if name is None or not is_temp(name):
+                    continue
+                if name not in interference:
+                    interference[name] = set()
+                    order.append(name)
+                for other in live:
+                    if other != name and is_temp(other):
+                        interference[name].add(other)
+                        interference.setdefault(other, set()).add(name)
+
+        slots = {}
+        pools = {}
+        slot_count = 0
+        for name in order:
+            slot_type = types.get(name)
+            if slot_type is None:
+                continue
+            taken = {slots[n] for n in interference[name] if n in slots}
+            pool = pools.setdefault(slot_type, [])
+            for slot in pool:
+                if slot not in taken:
+                    break
+            else:
+                slot_count += 1
+                slot = slot_count
+                pool.append(slot)
+            slots[name] = slot
+
+        # Renomeia tudo para %t1..%tn: slots primeiro, depois os temporários
+        # sem tipo conhecido, cada um com nome próprio
+        renames = {name: temp_name(slot) for name, slot in slots.items()}
+        next_slot = slot_count
+        for inst in instructions:
+            for arg in inst[1:]:
+                if is_temp(arg) and arg not in renames:
+                    next_slot += 1
+                    renames[arg] = temp_name(next_slot)
+
+        allocated = []
+        for op, arg1, arg2, res in instructions:
+            if op in ("LABEL", "JUMP"):
+                allocated.append((op, arg1, arg2, res))
+                continue
+            allocated.append((op, renames.get(arg1, arg1), renames.get(arg2, arg2), renames.get(res, res)))
+        self.stats["temps_before"] = len(renames)
+        self.stats["temp_slots"] = next_slot
+        return allocated
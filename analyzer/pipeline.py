@@ -0,0 +1,57 @@
+from analyzer.intermediate_code_generator import IntermediateCodeGenerator
+from analyzer.lexicalAnalysis import LexicalAnalysis
+from analyzer.optimizer import IROptimizer
+from analyzer.semantic_analysis import SemanticAnalysis
+from analyzer.SyntacticAnalysis import SyntacticAnalysis
+from analyzer.timings import PipelineTimings, count_nodes
+
+
+class CompiledProgram:
+    # Resultado do front end: código intermediário otimizado e os tipos
+    # declarados, que o executor usa no READ. spans (posição no fonte de cada
+    # instrução) só existe em -O0, quando as instruções são as geradas.
+    def __init__(self, instructions, symbols, stats=None, spans=None):
+        self.instructions = instructions
+        self.symbols = symbols
+        self.stats = stats or {}
+        self.spans = spans
+
+
+def compile_source(source_code, opt_level=1, timings=None, on_stage=None):
+    # Léxico, sintático, semântico, geração e otimização. Os erros de cada
+    # etapa (SyntaxError, SemanticError, ...) sobem para quem chamou.
+    # on_stage(etapa, resultado), se passado, é chamado ao fim de cada etapa
+    # (o --debug do main.py imprime tokens, AST e instruções por ele).
+    timings = timings if timings is not None else PipelineTimings()
+    on_stage = on_stage or (lambda name, result: None)
+    with timings.stage("lex"):
+        tokens = LexicalAnalysis(source_code).analyze()
+    timings.count("tokens", len(tokens))
+    on_stage("lex", tokens)
+    with timings.stage("parse"):
+        ast = SyntacticAnalysis(tokens).parse()
+    timings.count("ast_nodes", count_nodes(ast))
+    on_stage("parse", ast)
+    with timings.stage("semantic"):
+        semantic = SemanticAnalysis()
+        semantic.analyze(ast)
+    on_stage("semantic", semantic)
+    with timings.stage("irgen"):
+        # -O0 mantém o for com LTE/IF/ADD como referência
+        gen = IntermediateCodeGenerator(semantic.symbols if opt_level >= 1 else None)
+        gen.generate_from_ast(ast)
+    on_stage("irgen", gen)
+    with timings.stage("optimize"):
+        optimizer = IROptimizer(opt_level)
+        instructions = optimizer.optimize(gen.instructions)
+    timings.count("ir_instructions", len(gen.instructions))
+    timings.count("optimized_instructions", len(instructions))
+    spans = gen.spans if opt_level == 0 else None
+    program = CompiledProgram(instructions, semantic.symbols, optimizer.stats, spans)
+    on_stage("optimize", program)
+    return program
+
+
+def compile_file(path, opt_level=1, timings=None):
+    with open(path, "r", encoding="utf-8") as file:
+        return compile_source(file.read(), opt_level, timings)
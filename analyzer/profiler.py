@@ -0,0 +1,128 @@
+import time
+
+from analyzer.control_flow import ControlFlowGraph
+from analyzer.execute import IntermediateCodeExecutor
+
+
+class ProfilingExecutor(IntermediateCodeExecutor):
+    # Executa uma instrução por vez (_run com max_steps=1) e conta quantas
+    # vezes cada pc rodou; com timed soma também o tempo de cada uma, que
+    # inclui a espera pela entrada nos READ
+    def __init__(self, instructions, output=None, input_reader=None, symbols=None, timed=False):
+        super().__init__(instructions, output, input_reader, symbols)
+        self.timed = timed
+        self.counts = [0] * len(instructions)
+        self.times = [0.0] * len(instructions)
+
+    def run(self):
+        try:
+            self._profile()
+        finally:
+            self.out.flush()
+        return self.out.getvalue()
+
+    def _profile(self):
+        count = len(self.instructions)
+        counts = self.counts
+        times = self.times
+        clock = time.perf_counter
+        while self.pc < count:
+            pc = self.pc
+            counts[pc] += 1
+            if self.timed:
+                start = clock()
+                try:
+                    self._run(1)
+                finally:
+                    times[pc] += clock() - start
+            else:
+                self._run(1)
+
+
+class ExecutionProfile:
+    # Agrega as contagens por instrução em linhas do fonte e laços. spans
+    # vem do IntermediateCodeGenerator e precisa estar alinhado com as
+    # instruções, ou seja, código sem otimização (-O0).
+    def __init__(self, instructions, spans, counts, times=None):
+        self.instructions = instructions
+        self.spans = spans
+        self.counts = counts
+        self.times = times or [0.0] * len(instructions)
+        self.total = sum(counts)
+        self.loops = self._find_loops()
+
+    def _line(self, pc):
+        span = self.spans[pc]
+        return span[0] if span is not None else None
+
+    def _find_loops(self):
+        # [(linha do cabeçalho, pcs do laço)], de fora para dentro
+        cfg = ControlFlowGraph(self.instructions)
+        starts = []
+        pc = 0
+        for block in cfg.blocks:
+            starts.append(pc)
+            pc += len(block.instructions)
+        loops = []
+        for loop in cfg.natural_loops():
+            pcs = set()
+            for index in loop.blocks:
+                pcs.update(range(starts[index], starts[index] + len(cfg.blocks[index].instructions)))
+            loops.append((self._line(starts[loop.header.index]), pcs))
+        loops.sort(key=lambda loop: -len(loop[1]))
+        return loops
+
+    def by_line(self):
+        lines = {}
+        for pc, count in enumerate(self.counts):
+            if count:
+                entry = lines.setdefault(self._line(pc), [0, 0.0])
+                entry[0] += count
+                entry[1] += self.times[pc]
+        return lines
+
+    def by_loop(self):
+        result = []
+        for line, pcs in self.loops:
+            result.append((line, sum(self.counts[pc] for pc in pcs), sum(self.times[pc] for pc in pcs)))
+        return result
+
+    def annotate(self, source):
+        # Fonte com as instruções executadas (e o tempo, se houver) de cada linha
+        lines = self.by_line()
+        timed = any(self.times)
+        result = []
+        for number, text in enumerate(source.rstrip("\n").split("\n"), start=1):
+            count, spent = lines.get(number, (0, 0.0))
+            if count:
+                prefix = f"{count:>10} {100 * count / max(self.total, 1):5.1f}%"
+                if timed:
+                    prefix += f" {spent * 1000:9.2f}ms"
+            else:
+                prefix = " " * (17 + (12 if timed else 0))
+            result.append(f"{prefix} | {number:4} {text}")
+        result.append("")
+        result.append(f"{self.total} instruções executadas")
+        for line, count, spent in sorted(self.by_loop()):
+            summary = f"laço da linha {line}: {count} instruções ({100 * count / max(self.total, 1):.1f}%)"
+            if timed:
+                summary += f", {spent * 1000:.2f}ms"
+            result.append(summary)
+        return result
+
+    def collapsed(self, name="programa"):
+        # Formato "quadro;quadro;... valor" dos scripts de flamegraph: a
+        # pilha são os laços que contêm a instrução e a linha dela; o valor
+        # é o tempo em microssegundos, ou a contagem sem tempo medido
+        timed = any(self.times)
+        stacks = {}
+        for pc, count in enumerate(self.counts):
+            if not count:
+                continue
+            frames = [name]
+            frames.extend(f"laço linha {line}" for line, pcs in self.loops if pc in pcs)
+            frames.append(f"linha {self._line(pc)}")
+            key = ";".join(frames)
+            value = self.times[pc] * 1e6 if timed else count
+            stacks[key] = stacks.get(key, 0) + value
+        return [f"{key} {round(value)}" for key, value in stacks.items() if round(value) > 0]
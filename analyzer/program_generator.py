@@ -0,0 +1,330 @@
+import argparse
+import os
+import random
+import string
+
+COMPARISONS = ["<", "<=", ">", ">=", "="]
+INT_OPERATORS = ["+", "-", "*", "div", "mod"]
+REAL_OPERATORS = ["+", "-", "*", "/"]
+MODULI = ["7", "97", "1000", "65521"]
+
+
+class GeneratedProgram:
+    def __init__(self, name, source, input_text):
+        self.name = name
+        self.source = source
+        self.input_text = input_text
+
+
+class ProgramGenerator:
+    # Gera programas Pascal-- válidos e com tipos corretos. Cada método segue
+    # uma regra de miniPascal.gmr (<stmt>, <forStmt>, <expr>, ...), mas escolhe
+    # as alternativas sabendo o tipo de cada variável, para passar pelo
+    # semântico. Fica de fora o que o executor não roda ('==', '<>', menos
+    # unário) e o que poderia não terminar: contador de for nunca é atribuído
+    # no corpo, continue só em while (que incrementa o contador antes de
+    # tudo) e inteiros calculados passam por mod para não crescerem sem limite.
+    #
+    # statements: comandos no total; depth: aninhamento máximo de laços e ifs;
+    # expr_depth: profundidade das expressões; trips: voltas de cada laço;
+    # io: valores lidos da entrada (além dos limites dos laços).
+    def __init__(self, seed=None, statements=30, depth=3, expr_depth=3, trips=10, io=5):
+        self.rng = random.Random(seed)
+        self.statements = statements
+        self.max_depth = depth
+        self.expr_depth = expr_depth
+        self.trips = trips
+        self.io = io
+
+    def generate(self, name="gerado"):
+        count = max(2, self.statements // 4)
+        self.ints = [f"a{index}" for index in range(count)]
+        self.reals = [f"r{index}" for index in range(max(1, count // 2))]
+        self.strings = [f"t{index}" for index in range(max(1, count // 4))]
+        self.limits = [f"n{index}" for index in range(3)]
+        self.counters = [f"i{index}" for index in range(self.max_depth + 1)]
+        self.whiles = [f"w{index}" for index in range(self.max_depth + 1)]
+        self.loops = []  # "for" ou "while", de fora para dentro
+        self.depth = 0
+        self.reads_left = self.io
+        self.lines = []
+        self.inputs = []
+
+        for limit in self.limits:
+            self._line(f"readln({limit});")
+            self.inputs.append(str(self.rng.randint(max(1, self.trips // 2), max(1, self.trips))))
+        self._stmt_list(self.statements)
+        for variable in self.ints + self.reals + self.strings:
+            self._line(f"writeln('{variable} = ', {variable});")
+
+        declarations = [
+            f"  {', '.join(self.ints + self.limits + self.counters + self.whiles + ['x'])}: integer;",
+            f"  {', '.join(self.reals)}: real;",
+            f"  {', '.join(self.strings)}: string;",
+        ]
+        source = "\n".join([f"program {name};", "var", *declarations, "begin", *self.lines, "end."]) + "\n"
+        return GeneratedProgram(name, source, "".join(line + "\n" for line in self.inputs))
+
+    def _line(self, text):
+        self.lines.append("  " * (self.depth + 1) + text)
+
+    def _pick(self, weights):
+        kinds = list(weights)
+        return self.rng.choices(kinds, [weights[kind] for kind in kinds])[0]
+
+    # <stmtList> e <stmt>
+
+    def _stmt_list(self, budget):
+        while budget > 0:
+            budget -= self._stmt(budget)
+
+    def _stmt(self, budget):
+        weights = {"assign": 6, "write": 2, "if": 2, "empty": 0.2}
+        if self.depth < self.max_depth and budget > 1:
+            weights.update({"for": 2, "while": 1, "block": 0.5})
+        if self.depth == 0 and self.reads_left > 0:
+            # Leitura condicional desalinharia o .input
+            weights["read"] = 1
+        if self.loops:
+            weights["break"] = 0.2
+            if self.loops[-1] == "while":
+                weights["continue"] = 0.2
+        return getattr(self, "_" + self._pick(weights))(budget)
+
+    def _body_size(self, budget):
+        return self.rng.randint(1, max(1, min(budget - 1, 8)))
+
+    def _nested(self, budget, loop=None):
+        # Corpo de laço ou if: um comando solto ou um bloco begin ... end;
+        self.depth += 1
+        if loop:
+            self.loops.append(loop)
+        try:
+            if budget == 1 and loop is None and self.rng.random() < 0.5:
+                return self._stmt(1)
+            self.lines.append("  " * self.depth + "begin")
+            if loop == "while":
+                counter = self.whiles[self.depth - 1]
+                self._line(f"{counter} := {counter} + 1;")
+            self._stmt_list(budget)
+            self.lines.append("  " * self.depth + "end;")
+            return budget
+        finally:
+            self.depth -= 1
+            if loop:
+                self.loops.pop()
+
+    def _assign(self, budget):
+        kind = self._pick({"int": 5, "real": 2, "string": 1})
+        if kind == "int":
+            expression = self._int_expr(self.expr_depth)
+            if " " in expression:
+                expression = f"({expression}) mod {self.rng.choice(MODULI)}"
+            self._line(f"{self.rng.choice(self.ints)} := {expression};")
+        elif kind == "real":
+            # Reais só se leem fora de laços, senão r := r * 2.5 cresce
+            # exponencialmente
+            self._line(f"{self.rng.choice(self.reals)} := {self._real_expr(self.expr_depth, not self.loops)};")
+        else:
+            self._line(f"{self.rng.choice(self.strings)} := {self._string_leaf()};")
+        return 1
+
+    def _write(self, budget):
+        items = []
+        for _ in range(self.rng.randint(1, 4)):
+            kind = self._pick({"string": 3, "int": 3, "real": 1, "text": 1, "literal": 1})
+            if kind == "string":
+                items.append(self._string_literal())
+            elif kind == "int":
+                items.append(self.rng.choice(self.ints + self.limits))
+            elif kind == "real":
+                items.append(self.rng.choice(self.reals))
+            elif kind == "text":
+                items.append(self.rng.choice(self.strings))
+            else:
+                items.append(self._pick({str(self.rng.randint(0, 99)): 1, self._float_literal(): 1}))
+        self._line(f"{self._pick({'writeln': 4, 'write': 1})}({', '.join(items)});")
+        return 1
+
+    def _read(self, budget):
+        kind = self._pick({"loop": 2, "int": 2, "real": 1, "string": 1})
+        if kind == "loop" and self.depth < self.max_depth:
+            # Laço de leitura: muitos valores com um comando só
+            values = self.rng.randint(1, self.reads_left)
+            counter = self.counters[self.depth]
+            target = self.rng.choice(self.ints)
+            self._line(f"for {counter} := 1 to {values} do")
+            self._line("begin")
+            self._line("  readln(x);")
+            self._line(f"  {target} := ({target} + x) mod {self.rng.choice(MODULI)};")
+            self._line("end;")
+            self.inputs.extend(str(self.rng.randint(0, 999)) for _ in range(values))
+            self.reads_left -= values
+        elif kind == "real":
+            self._line(f"readln({self.rng.choice(self.reals)});")
+            self.inputs.append(self._float_literal())
+            self.reads_left -= 1
+        elif kind == "string":
+            self._line(f"readln({self.rng.choice(self.strings)});")
+            self.inputs.append(self._word())
+            self.reads_left -= 1
+        else:
+            self._line(f"readln({self.rng.choice(self.ints)});")
+            self.inputs.append(str(self.rng.randint(0, 999)))
+            self.reads_left -= 1
+        return 1
+
+    def _if(self, budget):
+        self._line(f"if {self._condition(2)} then")
+        used = 1 + self._nested(self._body_size(budget))
+        if budget - used > 0 and self.rng.random() < 0.4:
+            self._line("else")
+            used += self._nested(self._body_size(budget - used + 1))
+        return used
+
+    def _for(self, budget):
+        counter = self.counters[self.depth]
+        start = self.rng.choice(["0", "1", "1", "2"])
+        end = self.rng.choice(self.limits + [str(self.rng.randint(0, self.trips))])
+        self._line(f"for {counter} := {start} to {end} do")
+        return 1 + self._nested(self._body_size(budget), "for")
+
+    def _while(self, budget):
+        counter = self.whiles[self.depth]
+        limit = self.rng.choice(self.limits + [str(self.rng.randint(0, self.trips))])
+        self._line(f"{counter} := 0;")
+        condition = f"{counter} < {limit}"
+        if self.rng.random() < 0.5:
+            condition = f"({condition}) and ({self._condition(1)})"
+        self._line(f"while {condition} do")
+        return 1 + self._nested(self._body_size(budget), "while")
+
+    def _block(self, budget):
+        self._line("begin")
+        self.depth += 1
+        size = self._body_size(budget)
+        self._stmt_list(size)
+        self.depth -= 1
+        self._line("end;")
+        return size
+
+    def _break(self, budget):
+        self._line(f"if {self._condition(1)} then")
+        self.depth += 1
+        self._line("break;")
+        self.depth -= 1
+        return 1
+
+    def _continue(self, budget):
+        self._line(f"if {self._condition(1)} then")
+        self.depth += 1
+        self._line("continue;")
+        self.depth -= 1
+        return 1
+
+    def _empty(self, budget):
+        self._line(";")
+        return 1
+
+    # <expr>
+
+    def _condition(self, depth):
+        if depth > 0 and self.rng.random() < 0.3:
+            operator = self.rng.choice(["and", "or"])
+            return f"({self._condition(depth - 1)}) {operator} ({self._condition(depth - 1)})"
+        if depth > 0 and self.rng.random() < 0.1:
+            return f"not ({self._condition(depth - 1)})"
+        kind = self._pick({"int": 7, "real": 2, "string": 1})
+        operator = self.rng.choice(COMPARISONS)
+        if kind == "string":
+            return f"{self.rng.choice(self.strings)} {operator} {self._string_leaf()}"
+        if kind == "real":
+            return f"{self._real_expr(1, True)} {operator} {self._int_expr(1)}"
+        return f"{self._int_expr(1)} {operator} {self._int_expr(1)}"
+
+    def _wrap(self, left, operator, right):
+        # Parênteses nem sempre: a precedência de <add>/<mult> também é exercitada
+        if self.rng.random() < 0.5:
+            return f"({left} {operator} {right})"
+        return f"{left} {operator} {right}"
+
+    def _int_expr(self, depth):
+        if depth <= 0 or self.rng.random() < 0.3:
+            return self._int_leaf()
+        return self._wrap(self._int_expr(depth - 1), self.rng.choice(INT_OPERATORS), self._int_expr(depth - 1))
+
+    def _int_leaf(self):
+        kind = self._pick({"variable": 6, "decimal": 3, "hexadecimal": 0.5, "octal": 0.5})
+        if kind == "variable":
+            return self.rng.choice(self.ints + self.limits + self.counters)
+        value = self.rng.randint(1, 99)
+        if kind == "hexadecimal":
+            return f"0x{value:X}"
+        if kind == "octal":
+            return f"0{value:o}"
+        return str(value)
+
+    def _real_expr(self, depth, real_variables):
+        if depth <= 0 or self.rng.random() < 0.3:
+            kind = self._pick({"variable": 3 if real_variables else 0, "literal": 2, "int": 2})
+            if kind == "variable":
+                return self.rng.choice(self.reals)
+            return self._float_literal() if kind == "literal" else self._int_leaf()
+        return self._wrap(
+            self._real_expr(depth - 1, real_variables),
+            self.rng.choice(REAL_OPERATORS),
+            self._real_expr(depth - 1, real_variables),
+        )
+
+    def _float_literal(self):
+        return f"{self.rng.randint(0, 99)}.{self.rng.randint(0, 99):02d}"
+
+    def _word(self):
+        # Só letras: texto com cara de número vira número no executor
+        return "".join(self.rng.choice(string.ascii_lowercase) for _ in range(self.rng.randint(1, 6)))
+
+    def _string_literal(self):
+        return f"'{self._word()} '"
+
+    def _string_leaf(self):
+        if self.rng.random() < 0.5:
+            return self.rng.choice(self.strings)
+        return f"'{self._word()}'"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m analyzer.program_generator",
+        description="Gera programas Pascal-- válidos (e seus .input) para benchmarks e testes diferenciais",
+    )
+    parser.add_argument("-o", dest="diretorio", help="diretório dos .pas e .input (sem ele, imprime um programa)")
+    parser.add_argument("-n", dest="quantidade", type=int, default=1, help="quantos programas gerar")
+    parser.add_argument("--seed", type=int, default=0, help="semente do primeiro programa (os seguintes usam seed+1, ...)")
+    parser.add_argument("--prefixo", default="gerado", help="nome dos programas")
+    parser.add_argument("--comandos", type=int, default=30, help="comandos por programa")
+    parser.add_argument("--profundidade", type=int, default=3, help="aninhamento máximo de laços e ifs")
+    parser.add_argument("--expressoes", type=int, default=3, help="profundidade das expressões")
+    parser.add_argument("--voltas", type=int, default=10, help="voltas de cada laço")
+    parser.add_argument("--io", type=int, default=5, help="valores lidos da entrada")
+    args = parser.parse_args()
+
+    for index in range(args.quantidade):
+        generator = ProgramGenerator(
+            args.seed + index, args.comandos, args.profundidade, args.expressoes, args.voltas, args.io
+        )
+        program = generator.generate(f"{args.prefixo}{index}")
+        if not args.diretorio:
+            print(program.source, end="")
+            continue
+        os.makedirs(args.diretorio, exist_ok=True)
+        base = os.path.join(args.diretorio, program.name)
+        with open(base + ".pas", "w", encoding="utf-8") as file:
+            file.write(program.source)
+        with open(base + ".input", "w", encoding="utf-8") as file:
+            file.write(program.input_text)
+    if args.diretorio:
+        print(f"{args.quantidade} programas em {args.diretorio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+class OutputBuffer:
+    # Acumula a saída do programa em pedaços e só escreve no stream quando o
+    # buffer passa de buffer_size (buffer_size=0 escreve direto). Com
+    # capture=True guarda tudo em memória para getvalue().
+    def __init__(self, stream=None, buffer_size=8192, capture=True):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.capture = capture
+        self._pending = []
+        self._pending_size = 0
+        self._captured = []
+
+    def write(self, text):
+        if self.capture:
+            self._captured.append(text)
+        if self.stream is not None:
+            self._pending.append(text)
+            self._pending_size += len(text)
+            if self._pending_size >= self.buffer_size:
+                self.flush()
+
+    def flush(self):
+        if self.stream is None:
+            return
+        if self._pending:
+            self.stream.write("".join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+        self.stream.flush()
+
+    def getvalue(self):
+        if len(self._captured) > 1:
+            self._captured = ["".join(self._captured)]
+        return self._captured[0] if self._captured else ""
+
+
+class InputReader:
+    # Lê a entrada em bloco (stream ou texto em memória) e entrega tokens
+    # para leituras numéricas ou o resto da linha para leituras de string.
+    # Em terminal interativo cai para leitura linha a linha.
+    def __init__(self, stream=None, text=None):
+        self.stream = stream
+        self._text = text
+        self._lines = None
+        self._line = 0
+        self._rest = None
+
+    def _load(self):
+        text = self._text if self._text is not None else self.stream.read()
+        self._text = None
+        lines = text.split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()
+        self._lines = lines
+
+    def _next_line(self):
+        if self._lines is None:
+            if self._text is None and self.stream is not None and self.stream.isatty():
+                line = self.stream.readline()
+                if not line:
+                    raise EOFError("EOF when reading a line")
+                return line[:-1] if line.endswith("\n") else line
+            self._load()
+        if self._line >= len(self._lines):
+            raise EOFError("EOF when reading a line")
+        line = self._lines[self._line]
+        self._line += 1
+        return line
+
+    def read_line(self):
+        if self._rest is not None:
+            line, self._rest = self._rest, None
+            return line
+        return self._next_line()
+
+    def read_token(self):
+        while True:
+            line = self._rest if self._rest is not None else self._next_line()
+            parts = line.split(None, 1)
+            if parts:
+                break
+            self._rest = None
+        self._rest = parts[1] if len(parts) > 1 and parts[1].strip() else None
+        return parts[0]
+
+
+class InputPending(Exception):
+    # A leitura precisa de uma linha que ainda não chegou; nada foi consumido
+    pass
+
+
+class FeedInputReader(InputReader):
+    # Entrada alimentada aos poucos com feed(). Sem linha completa disponível
+    # a leitura levanta InputPending em vez de bloquear; depois de close() o
+    # fim da entrada vira EOFError como no InputReader.
+    def __init__(self):
+        super().__init__(text="")
+        self._lines = []
+        self._partial = ""
+        self.closed = False
+
+    def feed(self, text):
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        self._lines.extend(lines)
+
+    def close(self):
+        if self._partial:
+            self._lines.append(self._partial)
+            self._partial = ""
+        self.closed = True
+
+    def _next_line(self):
+        if self._line >= len(self._lines):
+            if self.closed:
+                raise EOFError("EOF when reading a line")
+            raise InputPending()
+        line = self._lines[self._line]
+        self._line += 1
+        return line
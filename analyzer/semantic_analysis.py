@@ -1,8 +1,9 @@
 class SemanticError(Exception):
     def __init__(self, message, node):
         self.node = node
-        self.line = getattr(node, "line", -1)
-        self.column = getattr(node, "column", -1)
+        # Expressões não guardam posição (ASTNode.line é None)
+        self.line = getattr(node, "line", None) or -1
+        self.column = getattr(node, "column", None) or -1
         super().__init__(f"{message} at line {self.line}, column {self.column}")
 
 
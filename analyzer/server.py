@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import socketserver
+import threading
+from collections import OrderedDict
+
+from analyzer.client import DEFAULT_SOCKET
+from analyzer.lexicalAnalysis import LexicalError
+from analyzer.pipeline import compile_source
+from analyzer.runtime_io import InputReader, OutputBuffer
+from analyzer.semantic_analysis import SemanticError
+from analyzer.SyntacticAnalysis import SyntaxError as ParseError
+
+# Protocolo: uma requisição JSON por linha e uma resposta por linha.
+#   {"id": 1, "op": "run", "source": "...", "input": "...", "opt_level": 1, "engine": "reference"}
+#   {"id": 1, "ok": true, "output": "...", "error": null, "cached": true}
+# Com ok false, "stage" diz se o erro foi na compilação ou na execução.
+# op: "compile" (só compila, devolve o número de instruções), "run" ou "stats".
+# Cada "run" tem um limite de max_steps instruções, para um laço infinito não
+# prender o servidor.
+
+DEFAULT_MAX_STEPS = 10_000_000
+
+
+class CompileServer:
+    # Estado que fica quente entre requisições: módulos já importados e os
+    # programas compilados, guardados pelo hash do fonte e nível de otimização
+    def __init__(self, executors, cache_size=128, max_steps=DEFAULT_MAX_STEPS):
+        self.executors = executors
+        self.cache_size = cache_size
+        self.max_steps = max_steps
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _compile(self, source, opt_level):
+        key = (hashlib.sha256(source.encode("utf-8")).hexdigest(), opt_level)
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key], True
+            self.misses += 1
+        program = compile_source(source, opt_level)
+        with self._lock:
+            self.cache[key] = program
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return program, False
+
+    def _invalid(self, request):
+        # Mensagem de erro se a requisição não tem a forma esperada
+        if not isinstance(request, dict):
+            return "Requisição precisa ser um objeto JSON"
+        if not isinstance(request.get("op", "run"), str):
+            return "'op' precisa ser texto"
+        if request.get("op", "run") == "stats":
+            return None
+        if not isinstance(request.get("source"), str):
+            return "Requisição sem 'source' (texto)"
+        if not isinstance(request.get("input", ""), str):
+            return "'input' precisa ser texto"
+        opt_level = request.get("opt_level", 1)
+        if isinstance(opt_level, bool) or opt_level not in (0, 1, 2):
+            return "'opt_level' precisa ser 0, 1 ou 2"
+        if not isinstance(request.get("engine", "reference"), str):
+            return "'engine' precisa ser texto"
+        return None
+
+    def handle(self, request):
+        error = self._invalid(request)
+        if error is not None:
+            request_id = request.get("id") if isinstance(request, dict) else None
+            return {"id": request_id, "ok": False, "output": "", "error": error}
+        response = {"id": request.get("id"), "ok": True, "output": "", "error": None}
+        op = request.get("op", "run")
+        if op == "stats":
+            response.update(cached_programs=len(self.cache), hits=self.hits, misses=self.misses)
+            return response
+        if op not in ("compile", "run"):
+            response.update(ok=False, error=f"Operação desconhecida: {op}")
+            return response
+
+        try:
+            program, cached = self._compile(request["source"], request.get("opt_level", 1))
+        except LexicalError as e:
+            response.update(ok=False, error=f"Erro léxico: {e}", stage="compile")
+            return response
+        except (ParseError, SyntaxError) as e:
+            response.update(ok=False, error=f"Erro sintático: {e}", stage="compile")
+            return response
+        except SemanticError as se:
+            response.update(ok=False, error=f"Erro semântico: {se}", stage="compile")
+            return response
+        except Exception as e:
+            # Um fonte inválido não pode derrubar o servidor
+            response.update(ok=False, error=f"Erro de compilação: {e}", stage="compile")
+            return response
+        response["cached"] = cached
+        if op == "compile":
+            response["instructions"] = len(program.instructions)
+            return response
+
+        engine = request.get("engine", "reference")
+        if engine not in self.executors:
+            response.update(ok=False, error=f"Executor desconhecido: {engine}")
+            return response
+        executor = self.executors[engine](
+            program.instructions, OutputBuffer(), InputReader(text=request.get("input", "")), program.symbols
+        )
+        try:
+            if not executor._run(self.max_steps):
+                response.update(ok=False, error=f"Limite de {self.max_steps} instruções excedido", stage="run")
+        except Exception as e:
+            response.update(ok=False, error=str(e), stage="run")
+        finally:
+            executor.out.flush()
+        response["output"] = executor.output
+        return response
+
+    def handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps({"id": None, "ok": False, "output": "", "error": f"JSON inválido: {e}"})
+        try:
+            response = self.handle(request)
+        except Exception as e:
+            # Nenhuma requisição derruba o servidor
+            request_id = request.get("id") if isinstance(request, dict) else None
+            response = {"id": request_id, "ok": False, "output": "", "error": f"Erro interno: {e}"}
+        return json.dumps(response, ensure_ascii=False)
+
+
+def serve_stdio(server, stdin, stdout):
+    for line in stdin:
+        if line.strip():
+            stdout.write(server.handle_line(line) + "\n")
+            stdout.flush()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                response = self.server.compile_server.handle_line(line.decode("utf-8"))
+                self.wfile.write(response.encode("utf-8") + b"\n")
+
+
+def serve_unix(server, path=DEFAULT_SOCKET):
+    if os.path.exists(path):
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, _Handler) as unix_server:
+        unix_server.compile_server = server
+        try:
+            unix_server.serve_forever()
+        finally:
+            os.unlink(path)
+
@@ -0,0 +1,66 @@
+import argparse
+import os
+
+from analyzer.control_flow import ControlFlowGraph
+from analyzer.pipeline import compile_file
+
+
+def opcode(inst):
+    # CALL WRITE e CALL READ são instruções diferentes para o executor
+    if inst[0] == "CALL":
+        return f"CALL_{inst[1]}"
+    return inst[0]
+
+
+def mine_ngrams(instructions, sizes=(2, 3), counts=None):
+    # Conta sequências de opcodes dentro de cada bloco básico: só elas podem
+    # virar uma instrução só, já que ninguém salta para o meio delas
+    counts = counts if counts is not None else {}
+    for block in ControlFlowGraph(instructions).blocks:
+        ops = [opcode(inst) for inst in block.instructions if inst[0] != "LABEL"]
+        for size in sizes:
+            for start in range(len(ops) - size + 1):
+                key = tuple(ops[start:start + size])
+                counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m analyzer.superinstructions",
+        description="Frequência de sequências de opcodes no código intermediário",
+    )
+    parser.add_argument("caminhos", nargs="+", help="arquivos .pas ou diretórios com eles")
+    parser.add_argument("-n", dest="sizes", type=int, nargs="+", default=[2, 3], help="tamanhos das sequências")
+    parser.add_argument("-O", dest="opt_level", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--top", type=int, default=20, help="quantas sequências mostrar")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.caminhos:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".pas"))
+        else:
+            files.append(path)
+
+    counts = {}
+    total = 0
+    compiled = 0
+    for path in files:
+        try:
+            instructions = compile_file(path, args.opt_level).instructions
+        except Exception as e:
+            print(f"{path}: ignorado ({e})")
+            continue
+        compiled += 1
+        total += len(instructions)
+        mine_ngrams(instructions, args.sizes, counts)
+
+    print(f"{compiled} programas, {total} instruções (-O{args.opt_level})")
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:args.top]
+    for key, count in ranked:
+        print(f"{count:6} {100 * count / max(total, 1):6.1f}%  {' + '.join(key)}")
+
+
+if __name__ == "__main__":
+    main()
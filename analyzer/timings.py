@@ -0,0 +1,77 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+def count_nodes(node):
+    # Mesmo percurso do print_ast: atributos que são nós ou listas de nós
+    if node is None or not node.__class__.__name__.endswith("Node"):
+        return 0
+    total = 1
+    for attr, value in vars(node).items():
+        if attr.startswith("_"):
+            continue
+        if isinstance(value, list):
+            total += sum(count_nodes(item) for item in value)
+        else:
+            total += count_nodes(value)
+    return total
+
+
+# Nomes das etapas e contadores no JSON e na tabela
+STAGE_LABELS = {
+    "lex": "léxico", "parse": "sintático", "semantic": "semântico",
+    "irgen": "geração", "optimize": "otimização", "execute": "execução",
+}
+COUNTER_LABELS = {
+    "tokens": "tokens", "ast_nodes": "nós da AST", "ir_instructions": "instruções geradas",
+    "optimized_instructions": "instruções otimizadas", "executed_instructions": "instruções executadas",
+    "final_variables": "variáveis no fim",
+}
+
+
+class PipelineTimings:
+    # Tempo de parede e de CPU por etapa, na ordem em que rodaram, mais
+    # contadores (tokens, nós da AST, instruções, ...)
+    def __init__(self):
+        self.stages = []  # [(etapa, parede, cpu)]
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - wall, time.process_time() - cpu))
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def to_dict(self):
+        return {
+            "stages": {name: {"wall": wall, "cpu": cpu} for name, wall, cpu in self.stages},
+            "total": {
+                "wall": sum(wall for _, wall, _ in self.stages),
+                "cpu": sum(cpu for _, _, cpu in self.stages),
+            },
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, **extra):
+        return json.dumps({**extra, **self.to_dict()}, ensure_ascii=False)
+
+    def table(self):
+        data = self.to_dict()
+        lines = [f"{'etapa':<12} {'parede (ms)':>12} {'cpu (ms)':>10}"]
+        for name, wall, cpu in self.stages:
+            lines.append(f"{STAGE_LABELS.get(name, name):<12} {wall * 1000:12.2f} {cpu * 1000:10.2f}")
+        lines.append(f"{'total':<12} {data['total']['wall'] * 1000:12.2f} {data['total']['cpu'] * 1000:10.2f}")
+        if self.counters:
+            lines.append("")
+            for name, value in self.counters.items():
+                # None: o executor não tem esse contador
+                value = "n/d" if value is None else value
+                lines.append(f"{COUNTER_LABELS.get(name, name):<24} {value:>10}")
+        return "\n".join(lines)
@@ -0,0 +1,406 @@
+from array import array
+
+from analyzer.control_flow import instruction_def
+from analyzer.execute import IntermediateCodeExecutor
+
+# Onde cada tipo de execução mora: inteiros em array('q'), reais em
+# array('d') e strings numa lista comum
+SLOT_KINDS = {"integer": "i", "real": "r", "string": "s"}
+KIND_TYPES = {kind: var_type for var_type, kind in SLOT_KINDS.items()}
+OPERAND_SOURCE = {"i": "I[{}]", "r": "R[{}]", "s": "S[{}]", "k": "{}"}
+
+BINARY_SOURCE = {
+    "ADD": "{a} + {b}",
+    "SUB": "{a} - {b}",
+    "MUL": "{a} * {b}",
+    "DIV": "({a} / {b} if {b} != 0 else 0.0)",
+    "INT_DIV": "({a} // {b} if {b} != 0 else 0)",
+    "MOD": "({a} % {b} if {b} != 0 else 0)",
+    "LT": "int({a} < {b})",
+    "GT": "int({a} > {b})",
+    "LTE": "int({a} <= {b})",
+    "GTE": "int({a} >= {b})",
+    "AND": "int(bool({a}) and bool({b}))",
+    "OR": "int(bool({a}) or bool({b}))",
+    "EQUALS": "int({a} == {b})",
+}
+BRANCH_SOURCE = {
+    "BR_LT": "{a} < {b}",
+    "BR_GT": "{a} > {b}",
+    "BR_LTE": "{a} <= {b}",
+    "BR_GTE": "{a} >= {b}",
+    "BR_EQ": "{a} == {b}",
+    "FOR_INIT": "{a} <= {b}",
+}
+COMPARISONS = {"LT", "GT", "LTE", "GTE"} | set(BRANCH_SOURCE)
+NUMERIC = ("integer", "real")
+
+
+class Unsupported(Exception):
+    pass
+
+
+class Deoptimize(Exception):
+    # Pede a troca para a referência a partir de pc, com valores que não
+    # couberam nos arrays
+    def __init__(self, pc, pending):
+        super().__init__(pc)
+        self.pc = pc
+        self.pending = pending
+
+
+class TypedExecutor:
+    # Executor especializado por tipo: cada instrução vira uma função gerada
+    # para os tipos dos seus operandos, sem _get_value/_set_variable no
+    # caminho. Se o programa tem algo que não dá para tipar estaticamente,
+    # roda inteiro no IntermediateCodeExecutor; se um inteiro estoura o
+    # array('q'), o estado passa para ele e a execução continua dali.
+    def __init__(self, instructions, output=None, input_reader=None, symbols=None):
+        self.instructions = instructions
+        self.reference = IntermediateCodeExecutor(instructions, output, input_reader, symbols)
+        self.out = self.reference.out
+        self.symbols = self.reference.symbols
+        self.deoptimized = False
+        self.fallback_reason = None
+        self.slots = {}  # nome -> (tipo do slot, índice)
+        self.ints = array("q")
+        self.reals = array("d")
+        self.strings = []
+        try:
+            self.handlers = self._compile()
+        except Unsupported as e:
+            self.handlers = None
+            self.fallback_reason = str(e)
+
+    @property
+    def output(self):
+        return self.out.getvalue()
+
+    @property
+    def variables(self):
+        if self.handlers is None or self.deoptimized:
+            return self.reference.variables
+        return {
+            name: {"value": self._slot_value(kind, index), "type": KIND_TYPES[kind]}
+            for name, (kind, index) in self.slots.items()
+        }
+
+    def _slot_value(self, kind, index):
+        if kind == "i":
+            return self.ints[index]
+        if kind == "r":
+            return self.reals[index]
+        return self.strings[index]
+
+    def run(self):
+        if self.handlers is None:
+            return self.reference.run()
+        try:
+            self._run()
+        finally:
+            self.out.flush()
+        return self.out.getvalue()
+
+    def _run(self, max_steps=None):
+        # Com max_steps para depois de tantas instruções e devolve False,
+        # como o IntermediateCodeExecutor._run (mas não dá para continuar)
+        if self.handlers is None:
+            return self.reference._run(max_steps)
+        handlers = self.handlers
+        count = len(handlers)
+        pc = 0
+        steps = 0
+        try:
+            if max_steps is None:
+                while pc < count:
+                    pc = handlers[pc]()
+            else:
+                while pc < count:
+                    if steps == max_steps:
+                        return False
+                    steps += 1
+                    pc = handlers[pc]()
+        except OverflowError:
+            # Inteiro fora do int64 (ou grande demais para real): a instrução
+            # não chegou a escrever nada, então a referência a repete
+            return self._deoptimize(pc, None, self._remaining(max_steps, steps))
+        except Deoptimize as e:
+            return self._deoptimize(e.pc, e.pending, self._remaining(max_steps, steps))
+        return True
+
+    def load(self, values):
+        # Estado vindo de outra execução (uma lane do BatchExecutor): nome ->
+        # valor. Os slots que não vierem voltam ao valor inicial do tipo.
+        self.deoptimized = False
+        self.ints[:] = array("q", [0]) * len(self.ints)
+        self.reals[:] = array("d", [0.0]) * len(self.reals)
+        self.strings[:] = [""] * len(self.strings)
+        for name, value in values.items():
+            kind, index = self.slots[name]
+            if kind == "i":
+                self.ints[index] = value
+            elif kind == "r":
+                self.reals[index] = value
+            else:
+                self.strings[index] = value
+
+    def run_until(self, pc, stop):
+        # Roda a partir de pc até um pc de stop (devolve esse pc) ou até o
+        # fim (devolve None); o estouro de inteiro passa para a referência,
+        # que vai até o fim
+        handlers = self.handlers
+        count = len(handlers)
+        try:
+            if not stop:
+                while pc < count:
+                    pc = handlers[pc]()
+            else:
+                while pc < count:
+                    if pc in stop:
+                        return pc
+                    pc = handlers[pc]()
+        except OverflowError:
+            self._deoptimize(pc)
+        except Deoptimize as e:
+            self._deoptimize(e.pc, e.pending)
+        return None
+
+    def _remaining(self, max_steps, steps):
+        # A instrução interrompida roda de novo na referência
+        return None if max_steps is None else max_steps - steps + 1
+
+    def _deoptimize(self, pc, pending=None, max_steps=None):
+        self.deoptimized = True
+        self.reference.variables = {
+            name: {"value": self._slot_value(kind, index), "type": KIND_TYPES[kind]}
+            for name, (kind, index) in self.slots.items()
+        }
+        self.reference.variables.update(pending or {})
+        self.reference.pc = pc
+        return self.reference._run(max_steps)
+
+    def _compile(self):
+        # Importado aqui: quem só executa um .pmmc não carrega o otimizador
+        # no início (main.py run)
+        from analyzer.optimizer import IROptimizer
+
+        types = IROptimizer(0).infer_types(self.instructions)
+        for inst in self.instructions:
+            name = instruction_def(inst)
+            if name is not None and name not in self.slots:
+                var_type = types.get(name)
+                if var_type not in SLOT_KINDS:
+                    raise Unsupported(f"tipo desconhecido para {name}")
+                kind = SLOT_KINDS[var_type]
+                if kind == "i":
+                    self.slots[name] = (kind, len(self.ints))
+                    self.ints.append(0)
+                elif kind == "r":
+                    self.slots[name] = (kind, len(self.reals))
+                    self.reals.append(0.0)
+                else:
+                    self.slots[name] = (kind, len(self.strings))
+                    self.strings.append("")
+
+        factories = {}
+        handlers = []
+        for pc, inst in enumerate(self.instructions):
+            shape, params = self._specialize(pc, inst)
+            if shape is None:
+                handlers.append(params)
+                continue
+            if shape not in factories:
+                factories[shape] = self._factory(shape)
+            handlers.append(factories[shape](self.ints, self.reals, self.strings, self.out.write, *params))
+        return handlers
+
+    def _operand(self, arg):
+        # (tipo do slot ou "k", índice ou valor constante, tipo de execução)
+        if arg in self.slots:
+            kind, index = self.slots[arg]
+            return kind, index, KIND_TYPES[kind]
+        value = self.reference._get_value(arg)
+        return "k", value, self.reference._get_type(value)
+
+    def _target(self, op, label):
+        if label not in self.reference.labels:
+            raise Unsupported(f"label não encontrado para {op}: {label}")
+        # O LABEL não faz nada: salta direto para a instrução seguinte a ele
+        return self.reference.labels[label] + 1
+
+    def _specialize(self, pc, inst):
+        op, arg1, arg2, res = inst
+        following = pc + 1
+
+        if op == "LABEL":
+            return ("LABEL",), (None, None, None, following, None)
+
+        if op == "JUMP":
+            return ("JUMP",), (None, None, None, following, self._target(op, arg1))
+
+        if op == "IF":
+            kind, value, _ = self._operand(arg1)
+            return ("IF", kind), (None, value, None, self._target(op, arg2), self._target(op, res))
+
+        if op in BRANCH_SOURCE:
+            left_kind, left, left_type = self._operand(arg1)
+            right_kind, right, right_type = self._operand(arg2)
+            self._check_comparable(op, left_type, right_type)
+            return (op, left_kind, right_kind), (None, left, right, following, self._target(op, res))
+
+        if op == "FOR_NEXT":
+            counter = self.slots.get(arg1)
+            if counter is None or counter[0] != "i":
+                raise Unsupported("FOR_NEXT sem variável inteira")
+            end_kind, end, end_type = self._operand(arg2)
+            if end_type not in NUMERIC:
+                raise Unsupported("FOR_NEXT com limite não numérico")
+            return (op, end_kind), (counter[1], None, end, following, self._target(op, res))
+
+        if op == "CALL":
+            if arg1 == "READ":
+                return None, self._read_handler(arg2, following)
+            if arg1 in ("WRITE", "WRITELN", "WRITE2"):
+                operands = [arg2, res] if arg1 == "WRITE2" else [arg2]
+                kinds = []
+                values = []
+                for arg in operands:
+                    kind, value, _ = self._operand(arg)
+                    if kind == "k":
+                        value = self._write_text(value)
+                    kinds.append(kind)
+                    values.append(value)
+                values += [None] * (2 - len(values))
+                return (arg1, *kinds), (None, values[0], values[1], following, None)
+            raise Unsupported(f"CALL {arg1}")
+
+        if op == "ATT" or op == "NOT" or op in BINARY_SOURCE:
+            dest_kind, dest, dest_type = self.slots[arg1][0], self.slots[arg1][1], KIND_TYPES[self.slots[arg1][0]]
+            left_kind, left, left_type = self._operand(arg2)
+            if op in ("ATT", "NOT"):
+                right_kind, right, right_type = "k", None, None
+            else:
+                right_kind, right, right_type = self._operand(res)
+            result_type = self._result_type(op, left_type, right_type)
+            self._check_store(arg1, dest_type, result_type)
+            return (op, dest_kind, left_kind, right_kind), (dest, left, right, following, None)
+
+        raise Unsupported(f"instrução {op}")
+
+    def _write_text(self, value):
+        if isinstance(value, str):
+            value = value.replace("\\n", "\n")
+        return str(value)
+
+    def _check_comparable(self, op, left_type, right_type):
+        if not (
+            (left_type in NUMERIC and right_type in NUMERIC)
+            or (left_type == right_type == "string")
+            or op == "BR_EQ"
+        ):
+            raise Unsupported(f"{op} entre {left_type} e {right_type}")
+
+    def _result_type(self, op, left, right):
+        if op == "ATT":
+            return left
+        if op in ("NOT", "AND", "OR", "EQUALS"):
+            return "integer"
+        if op in COMPARISONS:
+            self._check_comparable(op, left, right)
+            return "integer"
+        if op == "ADD" and left == right == "string":
+            return "string"
+        if left in NUMERIC and right in NUMERIC:
+            if op == "DIV" or "real" in (left, right):
+                return "real"
+            return "integer"
+        raise Unsupported(f"{op} entre {left} e {right}")
+
+    def _check_store(self, name, dest_type, result_type):
+        # As mesmas conversões de _set_variable: string aceita tudo via str()
+        # e real aceita inteiro; o resto daria erro de tipo na execução
+        if dest_type == result_type or dest_type == "string":
+            return
+        if dest_type == "real" and result_type == "integer":
+            return
+        raise Unsupported(f"atribuição de {result_type} em {name} ({dest_type})")
+
+    def _factory(self, shape):
+        op = shape[0]
+        lines = []
+        if op == "LABEL":
+            lines.append("return nxt")
+        elif op == "JUMP":
+            lines.append("return tgt")
+        elif op == "IF":
+            lines.append(f"return nxt if {self._source(shape[1], 'a')} else tgt")
+        elif op in BRANCH_SOURCE:
+            condition = BRANCH_SOURCE[op].format(a=self._source(shape[1], "a"), b=self._source(shape[2], "b"))
+            lines.append(f"return nxt if {condition} else tgt")
+        elif op == "FOR_NEXT":
+            lines.append("I[d] += 1")
+            lines.append(f"return tgt if I[d] <= {self._source(shape[1], 'b')} else nxt")
+        elif op in ("WRITE", "WRITELN", "WRITE2"):
+            for kind, name in zip(shape[1:], "ab"):
+                lines.append(f"W({self._text_source(kind, name)})")
+            if op == "WRITELN":
+                lines.append("W('\\n')")
+            lines.append("return nxt")
+        else:
+            _, dest_kind, left_kind, right_kind = shape
+            left = self._source(left_kind, "a")
+            right = self._source(right_kind, "b")
+            if op == "ATT":
+                expression = left
+            elif op == "NOT":
+                expression = f"int(not {left})"
+            else:
+                expression = BINARY_SOURCE[op].format(a=left, b=right)
+            if dest_kind == "s":
+                expression = f"str({expression})"
+            lines.append(f"{OPERAND_SOURCE[dest_kind].format('d')} = {expression}")
+            lines.append("return nxt")
+
+        body = "\n".join("        " + line for line in lines)
+        source = f"def make(I, R, S, W, d, a, b, nxt, tgt):\n    def handler():\n{body}\n    return handler\n"
+        namespace = {}
+        exec(source, namespace)
+        return namespace["make"]
+
+    def _source(self, kind, name):
+        return OPERAND_SOURCE[kind].format(name)
+
+    def _text_source(self, kind, name):
+        # Constantes já chegam como o texto final
+        if kind == "k":
+            return name
+        if kind == "s":
+            return f"S[{name}].replace('\\\\n', '\\n')"
+        return f"str({self._source(kind, name)})"
+
+    def _read_handler(self, name, following):
+        if name not in self.slots:
+            raise Unsupported(f"READ em {name}")
+        kind, index = self.slots[name]
+        reference = self.reference
+
+        def handler():
+            self.out.flush()
+            # _set_variable da referência faz as conversões e acusa os erros
+            # de tipo com as mesmas mensagens
+            reference.variables[name] = {"value": self._slot_value(kind, index), "type": KIND_TYPES[kind]}
+            reference._set_variable(name, reference._read_value(name))
+            stored = reference.variables.pop(name)
+            try:
+                if kind == "i":
+                    self.ints[index] = stored["value"]
+                elif kind == "r":
+                    self.reals[index] = stored["value"]
+                else:
+                    self.strings[index] = stored["value"]
+            except OverflowError:
+                # A entrada já foi consumida: segue na referência com o valor lido
+                raise Deoptimize(following, {name: stored})
+            return following
+
+        return handler
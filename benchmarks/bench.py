@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from analyzer.lexicalAnalysis import LexicalError
+from analyzer.pipeline import compile_source
+from analyzer.runtime_io import InputReader, OutputBuffer
+from analyzer.semantic_analysis import SemanticError
+from analyzer.SyntacticAnalysis import SyntaxError as ParseError
+from analyzer.timings import PipelineTimings
+from main import EXECUTORS
+from workloads import corpus_workloads, generated_workloads, synthetic_workloads
+
+STAGES = ["lex", "parse", "semantic", "irgen", "optimize", "execute"]
+
+
+def measure(workload, opt_level, engine):
+    # Uma repetição: compila do zero e executa (se houver entrada); devolve
+    # o tempo de parede de cada etapa e o total ("pipeline")
+    timings = PipelineTimings()
+    program = compile_source(workload.source, opt_level, timings)
+    if workload.input_text is not None:
+        executor = EXECUTORS[engine](
+            program.instructions, OutputBuffer(), InputReader(text=workload.input_text), program.symbols
+        )
+        with timings.stage("execute"):
+            executor.run()
+    result = {name: wall for name, wall, _ in timings.stages}
+    result["pipeline"] = sum(result.values())
+    return result, timings.counters
+
+
+def summarize(samples):
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "n": len(samples),
+    }
+
+
+def bench_workload(workload, opt_level, engine, warmup, repeat):
+    # Programa que não compila fica de fora antes de qualquer medição,
+    # inclusive com --warmup 0
+    try:
+        compile_source(workload.source, opt_level)
+    except (LexicalError, ParseError, SemanticError) as e:
+        return None, f"{type(e).__name__}: {e}"
+    samples = {}
+    counters = {}
+    try:
+        for _ in range(warmup):
+            measure(workload, opt_level, engine)
+        for _ in range(repeat):
+            result, counters = measure(workload, opt_level, engine)
+            for name, wall in result.items():
+                samples.setdefault(name, []).append(wall)
+    except Exception as e:
+        # Uma execução que falha (entrada que acaba, ...) não é medida como
+        # se tivesse terminado; o programa vai para "skipped" com o erro
+        return None, f"erro de execução: {type(e).__name__}: {e}"
+    return {"stages": {name: summarize(values) for name, values in samples.items()}, "counters": counters}, None
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    workloads = []
+    if not args.sem_corpus:
+        workloads += corpus_workloads()
+    workloads += synthetic_workloads(args.tamanhos, args.voltas)
+    workloads += generated_workloads(args.gerados, seed=args.seed)
+    if args.filtro:
+        workloads = [workload for workload in workloads if args.filtro in workload.name]
+
+    results = {}
+    skipped = {}
+    for workload in workloads:
+        start = time.perf_counter()
+        result, error = bench_workload(workload, args.opt_level, args.engine, args.warmup, args.repeat)
+        if result is None:
+            skipped[workload.name] = error
+            print(f"IGNORADO {workload.name}: {error}")
+            continue
+        results[workload.name] = result
+        pipeline = result["stages"]["pipeline"]
+        print(
+            f"{workload.name:<24} mediana {pipeline['median'] * 1000:10.3f} ms "
+            f"± {pipeline['stdev'] * 1000:.3f} ({time.perf_counter() - start:.1f}s)"
+        )
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opt_level": args.opt_level,
+            "engine": args.engine,
+            "warmup": args.warmup,
+            "repeat": args.repeat,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+    with open(args.saida, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"\n{len(results)} programas medidos, {len(skipped)} ignorados; resultados em {args.saida}")
+    return 0
+
+
+def compare(args):
+    # Compara as medianas etapa por etapa; é regressão quando o novo passa
+    # da base por mais que threshold (relativo) e min_delta (absoluto, para
+    # não acusar ruído em etapas de microssegundos)
+    with open(args.base, "r", encoding="utf-8") as file:
+        base = json.load(file)
+    with open(args.novo, "r", encoding="utf-8") as file:
+        new = json.load(file)
+    for key in ("opt_level", "engine"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"Aviso: {key} diferente ({base['meta'].get(key)} x {new['meta'].get(key)})")
+
+    regressions = 0
+    stages = STAGES + ["pipeline"] if args.etapas else ["pipeline"]
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        for stage in stages:
+            old_stats = base["results"][name]["stages"].get(stage)
+            new_stats = new["results"][name]["stages"].get(stage)
+            if old_stats is None or new_stats is None:
+                continue
+            old, current = old_stats["median"], new_stats["median"]
+            ratio = current / old if old else float("inf")
+            regressed = ratio > 1 + args.threshold and (current - old) * 1000 > args.min_delta
+            improved = ratio < 1 - args.threshold and (old - current) * 1000 > args.min_delta
+            mark = "REGRESSÃO" if regressed else "melhora" if improved else ""
+            if regressed:
+                regressions += 1
+            if mark or args.todos:
+                print(f"{name:<24} {stage:<10} {old * 1000:10.3f} -> {current * 1000:10.3f} ms ({ratio:5.2f}x) {mark}")
+    for name in sorted(set(base["results"]) ^ set(new["results"])):
+        print(f"{name}: só em {'base' if name in base['results'] else 'novo'}")
+    print(f"\n{regressions} regressões acima de {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks das etapas do compilador e do pipeline completo")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    run_parser = subparsers.add_parser("run", help="mede lista1 e os programas sintéticos e grava o JSON")
+    run_parser.add_argument("-o", dest="saida", default=os.path.join(BENCH_DIR, "results", "latest.json"))
+    run_parser.add_argument("-O", dest="opt_level", type=int, choices=[0, 1, 2], default=1)
+    run_parser.add_argument("--engine", choices=sorted(EXECUTORS), default="reference")
+    run_parser.add_argument("--warmup", type=int, default=1, help="execuções descartadas antes de medir")
+    run_parser.add_argument("--repeat", type=int, default=5, help="execuções medidas por programa")
+    run_parser.add_argument(
+        "--tamanhos", type=int, nargs="*", default=[10, 100, 1000], help="blocos dos programas sintéticos"
+    )
+    run_parser.add_argument(
+        "--gerados", type=int, nargs="*", default=[], help="comandos dos programas do gerador (padrão: nenhum)"
+    )
+    run_parser.add_argument("--seed", type=int, default=0, help="semente dos programas do gerador")
+    run_parser.add_argument("--voltas", type=int, default=100, help="iterações de cada laço sintético")
+    run_parser.add_argument("--sem-corpus", action="store_true", help="não mede os programas de lista1")
+    run_parser.add_argument("--filtro", help="só programas cujo nome contém o texto")
+
+    compare_parser = subparsers.add_parser("compare", help="compara dois JSON e acusa regressões")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("novo")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="aumento relativo tolerado (padrão: 0.10)")
+    compare_parser.add_argument("--min-delta", type=float, default=0.05, help="diferença mínima em ms (padrão: 0.05)")
+    compare_parser.add_argument("--etapas", action="store_true", help="compara cada etapa, não só o pipeline")
+    compare_parser.add_argument("--todos", action="store_true", help="lista também o que não mudou")
+
+    args = parser.parse_args(argv)
+    return run(args) if args.comando == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
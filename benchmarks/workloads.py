@@ -0,0 +1,68 @@
+import glob
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+CORPUS_DIR = os.path.join(ROOT, "lista1")
+INPUT_DIR = os.path.join(ROOT, "tests", "input", "lista1")
+sys.path.insert(0, ROOT)
+
+from analyzer.program_generator import ProgramGenerator
+
+
+class Workload:
+    # Um programa a medir; input None mede só a compilação
+    def __init__(self, name, source, input_text=None):
+        self.name = name
+        self.source = source
+        self.input_text = input_text
+
+
+def corpus_workloads():
+    workloads = []
+    for pas_file in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.pas"))):
+        name = os.path.splitext(os.path.basename(pas_file))[0]
+        with open(pas_file, "r", encoding="utf-8") as file:
+            source = file.read()
+        input_text = None
+        input_file = os.path.join(INPUT_DIR, name + ".input")
+        if os.path.exists(input_file):
+            with open(input_file, "r", encoding="utf-8") as file:
+                input_text = file.read()
+        workloads.append(Workload(f"lista1/{name}", source, input_text))
+    return workloads
+
+
+def synthetic_source(blocks):
+    # Cada bloco é um for com aritmética e um if, então tokens, nós da AST e
+    # instruções crescem linearmente com blocks; n vem da entrada
+    names = [f"s{index}" for index in range(blocks)]
+    lines = [f"program sintetico{blocks};", f"var i, n, {', '.join(names)}: integer;", "begin", "  readln(n);"]
+    for index, name in enumerate(names):
+        lines += [
+            f"  {name} := {index};",
+            "  for i := 1 to n do",
+            "  begin",
+            f"    {name} := {name} + i * {index % 5 + 2} mod 7;",
+            f"    if {name} > 100 then",
+            f"      {name} := {name} - 100;",
+            "  end;",
+            f"  writeln('bloco {index}: ', {name});",
+        ]
+    lines.append("end.")
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_workloads(sizes, trips=100):
+    return [Workload(f"sintetico/{size}", synthetic_source(size), f"{trips}\n") for size in sizes]
+
+
+def generated_workloads(sizes, trips=10, seed=0):
+    # Programas do ProgramGenerator: mais variados que o modelo fixo acima,
+    # com a mesma semente para que duas rodadas meçam os mesmos programas
+    workloads = []
+    for size in sizes:
+        program = ProgramGenerator(seed, statements=size, trips=trips, io=max(1, size // 10)).generate(f"gerado{size}")
+        workloads.append(Workload(f"gerado/{size}", program.source, program.input_text))
+    return workloads
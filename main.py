@@ -1,10 +1,10 @@
-import sys
+import argparse
 import os
-from analyzer.lexicalAnalysis import LexicalAnalysis
-from analyzer.SyntacticAnalysis import SyntacticAnalysis
-from analyzer.intermediate_code_generator import IntermediateCodeGenerator
-from analyzer.semantic_analysis import SemanticAnalysis, SemanticError
+import sys
 from analyzer.execute import IntermediateCodeExecutor
+from analyzer.typed_execute import TypedExecutor
+from analyzer.bytecode import BytecodeError, disassemble, read_bytecode, write_bytecode
+from analyzer.timings import PipelineTimings
 
 def print_ast(node, indent=0):
     prefix = "  " * indent
@@ -33,48 +33,77 @@ def print_ast(node, indent=0):
             print(repr(value))
     print(f"{prefix})")
 
-def executar_codigo(caminho_arquivo, should_print_helpers = False):
-    source_code = processar_arquivo(caminho_arquivo, should_print_helpers)
-
-    lex = LexicalAnalysis(source_code)
-    tokens = lex.analyze()
+# reference: IntermediateCodeExecutor; typed: slots tipados com volta para a
+# referência quando um inteiro estoura
+EXECUTORS = {"reference": IntermediateCodeExecutor, "typed": TypedExecutor}
 
-    if should_print_helpers:
-        for t in tokens:
+def imprimir_etapa(etapa, resultado, opt_level):
+    # --debug: resultado de cada etapa do compile_source assim que ela termina
+    if etapa == "lex":
+        for t in resultado:
             print(f"{t.token_type}({t.value})", end=" ")
         print()
+    elif etapa == "parse":
+        print("Parsing successful!")
 
-    try:
-        parser = SyntacticAnalysis(tokens)
-        ast = parser.parse()
+        print("\nAST:")
+        print_ast(resultado)
+    elif etapa == "semantic":
+        print("Semantic analysis successful!")
+    elif etapa == "irgen":
+        resultado.print_instructions()
+    elif etapa == "optimize":
+        from analyzer.intermediate_code_generator import IntermediateCodeGenerator
 
-        if should_print_helpers:
-            print("Parsing successful!")
+        print(f"\nOptimized (-O{opt_level}):")
+        IntermediateCodeGenerator().print_instructions(resultado.instructions)
+        print(resultado.stats)
+        print("\n\texecute\n\n")
 
-            print("\nAST:")
-            print_ast(ast)
+def compilar_fonte(compile, *args):
+    # Chama compile_file ou compile_source do pipeline e mostra o erro de
+    # compilação, se houver (devolve None). O front end só é importado aqui,
+    # então run e disasm de um .pmmc não o carregam.
+    from analyzer.lexicalAnalysis import LexicalError
+    from analyzer.semantic_analysis import SemanticError
+    from analyzer.SyntacticAnalysis import SyntaxError as ParseError
 
-        try:
-            semantic = SemanticAnalysis()
-            semantic.analyze(ast)
+    try:
+        return compile(*args)
+    except LexicalError as e:
+        print(f"Erro léxico: {e}")
+    except ParseError as e:
+        print(f"Erro sintático: {e}")
+    except SemanticError as se:
+        print(f"Erro semântico: {se}")
+    return None
 
-            if should_print_helpers:
-                print("Semantic analysis successful!")
+def executar_codigo(caminho_arquivo, should_print_helpers = False, opt_level = 1, engine = "reference", timings = None):
+    # timings (PipelineTimings) recebe o tempo de cada etapa e os contadores
+    from analyzer.pipeline import compile_source
 
-            gen = IntermediateCodeGenerator()
-            gen.generate_from_ast(ast)
+    timings = timings if timings is not None else PipelineTimings()
+    source_code = processar_arquivo(caminho_arquivo, should_print_helpers)
+    if source_code is None:
+        return
 
-            if should_print_helpers:
-                gen.print_instructions()
-                print("\n\texecute\n\n")
+    on_stage = None
+    if should_print_helpers:
+        on_stage = lambda etapa, resultado: imprimir_etapa(etapa, resultado, opt_level)
+    program = compilar_fonte(compile_source, source_code, opt_level, timings, on_stage)
+    if program is None:
+        return
 
-            executor = IntermediateCodeExecutor(gen.instructions)
+    executor = EXECUTORS[engine](program.instructions, symbols=program.symbols)
+    try:
+        with timings.stage("execute"):
             return executor.run()
-            
-        except SemanticError as se:
-            print(f"Erro semântico: {se}")
-    except SyntaxError as e:
-        print(f"Erro sintático: {e}")
+    finally:
+        # O typed não conta instruções (custaria no laço de despacho), só a
+        # referência: sem contador fica None (n/d na tabela, null no JSON).
+        # As variáveis nunca saem do dicionário, então o fim é também o pico.
+        timings.count("executed_instructions", getattr(executor, "steps", None))
+        timings.count("final_variables", len(executor.variables))
 
 def processar_arquivo(caminho_arquivo, should_print_helpers):
     if not os.path.exists(caminho_arquivo):
@@ -90,9 +119,256 @@ def processar_arquivo(caminho_arquivo, should_print_helpers):
     return source_code
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso: python main.py <caminho-do-arquivo>")
+def compilar(args):
+    from analyzer.pipeline import compile_file
+
+    saida = args.saida or os.path.splitext(args.arquivo)[0] + ".pmmc"
+    program = compilar_fonte(compile_file, args.arquivo, args.opt_level)
+    if program is None:
+        return 1
+    try:
+        write_bytecode(saida, program.instructions, program.symbols, args.opt_level)
+    except BytecodeError as e:
+        print(f"Erro de bytecode: {e}")
+        return 1
+    print(f"{saida}: {len(program.instructions)} instruções")
+    return 0
+
+
+def executar_bytecode(args):
+    try:
+        program = read_bytecode(args.arquivo)
+    except BytecodeError as e:
+        print(f"Erro de bytecode: {e}")
+        return 1
+    EXECUTORS[args.engine](program.instructions, symbols=program.symbols).run()
+    return 0
+
+
+def executar_lote(args):
+    # Mesmo programa para várias entradas; a saída de cada uma vai para
+    # <entrada>.out (ou para o diretório -d)
+    if args.arquivo.endswith(".pmmc"):
+        try:
+            program = read_bytecode(args.arquivo)
+        except BytecodeError as e:
+            print(f"Erro de bytecode: {e}")
+            return 1
     else:
-        caminho_arquivo = sys.argv[1]
-        executar_codigo(caminho_arquivo)
\ No newline at end of file
+        from analyzer.pipeline import compile_file
+
+        program = compilar_fonte(compile_file, args.arquivo, args.opt_level)
+        if program is None:
+            return 1
+    # NumPy só é importado por quem usa o lote
+    from analyzer.batch_execute import BatchExecutor
+
+    entradas = []
+    for caminho in args.entradas:
+        with open(caminho, "r", encoding="utf-8") as file:
+            entradas.append(file.read())
+    batch = BatchExecutor(program.instructions, entradas, program.symbols)
+    saidas = batch.run()
+    if args.diretorio:
+        os.makedirs(args.diretorio, exist_ok=True)
+    falhas = 0
+    for caminho, saida, erro in zip(args.entradas, saidas, batch.errors):
+        destino = os.path.splitext(caminho)[0] + ".out"
+        if args.diretorio:
+            destino = os.path.join(args.diretorio, os.path.basename(destino))
+        with open(destino, "w", encoding="utf-8") as file:
+            file.write(saida)
+        if erro is not None:
+            falhas += 1
+            print(f"{caminho}: {erro}")
+    if batch.fallback_reason:
+        print(f"executado instância a instância: {batch.fallback_reason}")
+    print(f"{len(saidas)} entradas, {falhas} com erro, {batch.scalar_lanes} no executor escalar")
+    return 1 if falhas else 0
+
+
+def desmontar(args):
+    try:
+        program = read_bytecode(args.arquivo)
+    except BytecodeError as e:
+        print(f"Erro de bytecode: {e}")
+        return 1
+    print("\n".join(disassemble(program)))
+    return 0
+
+
+def servir(args):
+    from analyzer.server import DEFAULT_MAX_STEPS, CompileServer, serve_stdio, serve_unix
+
+    max_steps = DEFAULT_MAX_STEPS if args.max_steps is None else args.max_steps
+    server = CompileServer(EXECUTORS, max_steps=max_steps)
+    if args.stdio:
+        serve_stdio(server, sys.stdin, sys.stdout)
+        return 0
+    print(f"ouvindo em {args.socket}")
+    try:
+        serve_unix(server, args.socket)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cliente(args):
+    from analyzer.client import run_remote
+
+    return run_remote(args.arquivo, args.opt_level, args.engine, args.socket)
+
+
+def perfilar(args):
+    # O perfil por linha precisa das instruções como foram geradas, então
+    # compila sempre em -O0
+    from analyzer.pipeline import compile_file
+    from analyzer.profiler import ExecutionProfile, ProfilingExecutor
+
+    source_code = processar_arquivo(args.arquivo, False)
+    if source_code is None:
+        return 1
+    program = compilar_fonte(compile_file, args.arquivo, 0)
+    if program is None:
+        return 1
+    executor = ProfilingExecutor(program.instructions, symbols=program.symbols, timed=args.profile_time)
+    try:
+        executor.run()
+    finally:
+        profile = ExecutionProfile(program.instructions, program.spans, executor.counts, executor.times)
+        if args.profile_format == "collapsed":
+            lines = profile.collapsed(os.path.splitext(os.path.basename(args.arquivo))[0])
+        else:
+            lines = profile.annotate(source_code)
+        if args.profile_out:
+            with open(args.profile_out, "w", encoding="utf-8") as file:
+                file.write("\n".join(lines) + "\n")
+        else:
+            print("\n".join(lines), file=sys.stderr)
+    return 0
+
+
+def perfilar_memoria(args):
+    # O MemoryProfile tem a mesma interface do PipelineTimings, então os
+    # contadores (tokens, nós, instruções, variáveis) vêm junto
+    from analyzer.memprofile import MemoryProfile
+
+    profile = MemoryProfile()
+    try:
+        executar_codigo(args.arquivo, args.debug, args.opt_level, args.engine, profile)
+    finally:
+        profile.stop()
+        report = profile.to_json(arquivo=args.arquivo, opt_level=args.opt_level, engine=args.engine)
+        if args.memprofile_out is None:
+            print(report, file=sys.stderr)
+        else:
+            with open(args.memprofile_out, "w", encoding="utf-8") as file:
+                file.write(report + "\n")
+    return 0
+
+
+def add_opt_level(parser):
+    parser.add_argument(
+        "-O", dest="opt_level", type=int, choices=[0, 1, 2], default=1,
+        help="nível de otimização do código intermediário (padrão: 1)",
+    )
+
+
+def add_engine(parser):
+    parser.add_argument(
+        "--engine", choices=sorted(EXECUTORS), default="reference",
+        help="executor do código intermediário (padrão: reference)",
+    )
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    commands = {
+        "compile": compilar, "run": executar_bytecode, "batch": executar_lote, "disasm": desmontar,
+        "serve": servir, "client": cliente,
+    }
+
+    if argv and argv[0] in commands:
+        from analyzer.client import DEFAULT_SOCKET, add_client_arguments
+
+        parser = argparse.ArgumentParser(
+            prog="main.py", description="Compilador e interpretador Pascal--"
+        )
+        sub = parser.add_subparsers(dest="comando", required=True)
+        compile_parser = sub.add_parser("compile", help="gera bytecode .pmmc a partir de um .pas")
+        compile_parser.add_argument("arquivo", help="caminho do programa .pas")
+        compile_parser.add_argument("-o", dest="saida", help="arquivo de saída (padrão: <arquivo>.pmmc)")
+        add_opt_level(compile_parser)
+        run_parser = sub.add_parser("run", help="executa um bytecode .pmmc")
+        run_parser.add_argument("arquivo", help="caminho do bytecode .pmmc")
+        add_engine(run_parser)
+        batch_parser = sub.add_parser("batch", help="executa um programa para várias entradas de uma vez")
+        batch_parser.add_argument("arquivo", help="caminho do programa .pas ou do bytecode .pmmc")
+        batch_parser.add_argument("entradas", nargs="+", help="arquivos de entrada, um por instância")
+        batch_parser.add_argument("-d", dest="diretorio", help="diretório das saídas (padrão: ao lado de cada entrada)")
+        add_opt_level(batch_parser)
+        disasm_parser = sub.add_parser("disasm", help="lista as instruções de um bytecode .pmmc")
+        disasm_parser.add_argument("arquivo", help="caminho do bytecode .pmmc")
+        serve_parser = sub.add_parser("serve", help="servidor que mantém módulos e programas compilados em memória")
+        serve_parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"socket Unix (padrão: {DEFAULT_SOCKET})")
+        serve_parser.add_argument("--stdio", action="store_true", help="JSON por linha na entrada e saída padrão em vez do socket")
+        serve_parser.add_argument(
+            "--max-steps", type=int,
+            help="instruções por execução antes de desistir (padrão: 10 milhões)",
+        )
+        client_parser = sub.add_parser(
+            "client", help="executa um .pas no servidor, como main.py <arquivo> (sem carregar o compilador: python -m analyzer.client)"
+        )
+        add_client_arguments(client_parser)
+        args = parser.parse_args(argv)
+        return commands[args.comando](args)
+
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Compilador e interpretador Pascal--",
+        epilog="subcomandos: compile, run, batch, disasm, serve e client (main.py <subcomando> -h)",
+    )
+    parser.add_argument("arquivo", help="caminho do programa .pas")
+    add_opt_level(parser)
+    add_engine(parser)
+    parser.add_argument(
+        "--debug", action="store_true",
+        help="mostra tokens, AST e código intermediário antes de executar",
+    )
+    # Os modos são flags sem valor e o formato/arquivo vai numa opção à
+    # parte, para que "--timings prog.pas" não tome o programa como valor
+    parser.add_argument("--timings", action="store_true", help="tempo de cada etapa e contadores no stderr")
+    parser.add_argument(
+        "--timings-format", choices=["table", "json"], default="table",
+        help="formato do --timings: tabela ou JSON (padrão: table)",
+    )
+    parser.add_argument("--profile", action="store_true", help="perfil por linha do fonte (sempre em -O0)")
+    parser.add_argument(
+        "--profile-format", choices=["annotate", "collapsed"], default="annotate",
+        help="fonte anotado ou pilhas para flamegraph (padrão: annotate)",
+    )
+    parser.add_argument("--profile-time", action="store_true", help="mede também o tempo de cada instrução")
+    parser.add_argument("--profile-out", help="arquivo do perfil (padrão: stderr)")
+    parser.add_argument(
+        "--memprofile", action="store_true",
+        help="memória de cada etapa (pico, retida, maiores alocações) em JSON",
+    )
+    parser.add_argument("--memprofile-out", metavar="ARQUIVO", help="arquivo do --memprofile (padrão: stderr)")
+    args = parser.parse_args(argv)
+    if args.profile:
+        return perfilar(args)
+    if args.memprofile:
+        return perfilar_memoria(args)
+    timings = PipelineTimings()
+    try:
+        executar_codigo(args.arquivo, args.debug, args.opt_level, args.engine, timings)
+    finally:
+        if args.timings and args.timings_format == "json":
+            print(timings.to_json(arquivo=args.arquivo, opt_level=args.opt_level, engine=args.engine), file=sys.stderr)
+        elif args.timings:
+            print(timings.table(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+import argparse
+import asyncio
+import glob
+import os
+import random
+import re
+import signal
+import sys
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT)
+
+from analyzer.async_execute import AsyncExecutor
+from analyzer.batch_execute import BatchExecutor
+from analyzer.bytecode import decode, encode
+from analyzer.execute import IntermediateCodeExecutor
+from analyzer.lexicalAnalysis import LexicalError
+from analyzer.pipeline import compile_source
+from analyzer.program_generator import ProgramGenerator
+from analyzer.runtime_io import InputReader, OutputBuffer
+from analyzer.semantic_analysis import SemanticError
+from analyzer.SyntacticAnalysis import SyntaxError as ParseError
+from analyzer.typed_execute import TypedExecutor
+
+# Referência: IntermediateCodeExecutor no código sem otimização (-O0).
+# Cada configuração (executor, nível) precisa dar a mesma saída e o mesmo
+# erro ou falta de erro. O estado final das variáveis declaradas é comparado
+# com a referência no mesmo nível: o otimizador pode tirar atribuições que
+# ninguém lê (j := j - 1 no fim do programa), o que não muda a saída.
+ENGINES = ["reference", "typed", "batch", "async", "bytecode"]
+
+
+class Timeout(BaseException):
+    # BaseException: os executores que fazem except Exception não a engolem
+    pass
+
+
+class Outcome:
+    def __init__(self, output, error=None, variables=None):
+        self.output = output
+        self.error = error
+        self.variables = variables
+
+
+def _on_alarm(signum, frame):
+    raise Timeout()
+
+
+def _declared_values(variables, symbols):
+    return {name: repr(variables[name]["value"]) for name in symbols if name in variables}
+
+
+def run_reference(program, input_text, max_steps):
+    # Devolve None se o programa não termina em max_steps instruções
+    executor = IntermediateCodeExecutor(program.instructions, OutputBuffer(), InputReader(text=input_text), program.symbols)
+    error = None
+    try:
+        if not executor._run(max_steps):
+            return None
+    except Exception as e:
+        error = e
+    return Outcome(executor.output, error, _declared_values(executor.variables, program.symbols))
+
+
+def _run_executor(executor, symbols):
+    error = None
+    try:
+        executor.run()
+    except Exception as e:
+        error = e
+    return Outcome(executor.output, error, _declared_values(executor.variables, symbols))
+
+
+def run_engine(engine, program, input_text):
+    if engine == "reference":
+        return _run_executor(IntermediateCodeExecutor(
+            program.instructions, OutputBuffer(), InputReader(text=input_text), program.symbols
+        ), program.symbols)
+    if engine == "typed":
+        return _run_executor(TypedExecutor(
+            program.instructions, OutputBuffer(), InputReader(text=input_text), program.symbols
+        ), program.symbols)
+    if engine == "bytecode":
+        # Ida e volta pelo formato .pmmc antes de executar
+        loaded = decode(encode(program.instructions, program.symbols))
+        return _run_executor(IntermediateCodeExecutor(
+            loaded.instructions, OutputBuffer(), InputReader(text=input_text), loaded.symbols
+        ), loaded.symbols)
+    if engine == "batch":
+        # Uma lane só, mas com min_lanes=1 para não cair direto no escalar
+        executor = BatchExecutor(program.instructions, [input_text], program.symbols, min_lanes=1)
+        output = executor.run()[0]
+        return Outcome(output, executor.errors[0])
+    if engine == "async":
+        lines = iter(input_text.splitlines(keepends=True))
+
+        async def read_line():
+            return next(lines, "")
+
+        # slice_size pequeno para pausar no meio dos laços
+        executor = AsyncExecutor(program.instructions, read_line, OutputBuffer(), program.symbols, slice_size=97)
+        error = None
+        try:
+            asyncio.run(executor.run())
+        except Exception as e:
+            error = e
+        return Outcome(executor.output, error, _declared_values(executor.variables, program.symbols))
+    raise ValueError(f"Executor desconhecido: {engine}")
+
+
+def compare(expected, outcome, state=None):
+    # Descrição da primeira diferença, ou None; state é a execução da
+    # referência no mesmo código (mesmo nível) que outcome
+    if (expected.error is None) != (outcome.error is None):
+        return f"erro: esperado {expected.error!r}, obtido {outcome.error!r}"
+    if expected.output != outcome.output:
+        index = next(
+            (i for i, (a, b) in enumerate(zip(expected.output, outcome.output)) if a != b),
+            min(len(expected.output), len(outcome.output)),
+        )
+        return (
+            f"saída difere no caractere {index}: esperado {expected.output[index:index + 40]!r}, "
+            f"obtido {outcome.output[index:index + 40]!r}"
+        )
+    if state is not None and state.error is None and outcome.error is None and outcome.variables is not None:
+        for name, value in state.variables.items():
+            if outcome.variables.get(name) != value:
+                return f"variável {name}: esperado {value}, obtido {outcome.variables.get(name)}"
+    return None
+
+
+class DifferentialTester:
+    def __init__(self, configs, max_steps=2_000_000, timeout=5.0):
+        self.configs = configs  # [(executor, nível)]
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self._programs = {}
+
+    def _compile(self, source, opt_level):
+        key = (source, opt_level)
+        if key not in self._programs:
+            if len(self._programs) > 64:
+                self._programs.clear()
+            self._programs[key] = compile_source(source, opt_level)
+        return self._programs[key]
+
+    def _run(self, engine, program, input_text):
+        signal.setitimer(signal.ITIMER_REAL, self.timeout)
+        try:
+            return run_engine(engine, program, input_text)
+        except Timeout:
+            return Outcome("", Timeout(f"mais de {self.timeout}s"))
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    def check(self, source, input_text, configs=None):
+        # None se o programa não serve (não compila ou não termina na
+        # referência); senão [(configuração, diferença)]
+        try:
+            expected = run_reference(self._compile(source, 0), input_text, self.max_steps)
+        except (LexicalError, ParseError, SemanticError, RecursionError):
+            return None
+        except Exception:
+            # O gerador de código intermediário também rejeita (break fora de laço, ...)
+            return None
+        if expected is None:
+            return None
+        states = {0: expected}
+        divergences = []
+        for engine, opt_level in configs or self.configs:
+            try:
+                program = self._compile(source, opt_level)
+            except Exception as e:
+                divergences.append(((engine, opt_level), f"falha ao compilar em -O{opt_level}: {e!r}"))
+                continue
+            if opt_level not in states:
+                states[opt_level] = run_reference(program, input_text, self.max_steps)
+            try:
+                outcome = self._run(engine, program, input_text)
+            except Exception as e:
+                outcome = Outcome("", e)
+            difference = compare(expected, outcome, states[opt_level])
+            if difference is not None:
+                divergences.append(((engine, opt_level), difference))
+        return divergences
+
+    def minimize(self, source, input_text, config, deadline):
+        # Reduz o programa enquanto a mesma configuração continuar divergindo:
+        # delta debugging nas linhas do fonte e da entrada, blocos begin/end
+        # desembrulhados e variáveis tiradas das declarações, até nenhuma
+        # dessas reduções funcionar mais (ou o tempo acabar)
+        def fails(lines, inputs):
+            if time.monotonic() >= deadline:
+                return False
+            return bool(self.check("\n".join(lines), "".join(inputs), [config]))
+
+        lines = source.split("\n")
+        inputs = input_text.splitlines(keepends=True)
+        while time.monotonic() < deadline:
+            size = (len(lines), len(inputs), sum(map(len, lines)))
+            lines = _reduce_chunks(lines, lambda candidate: fails(candidate, inputs))
+            inputs = _reduce_chunks(inputs, lambda candidate: fails(lines, candidate))
+            lines = _unwrap_blocks(lines, lambda candidate: fails(candidate, inputs))
+            lines = _drop_declared(lines, lambda candidate: fails(candidate, inputs))
+            if (len(lines), len(inputs), sum(map(len, lines))) == size:
+                break
+        return "\n".join(lines), "".join(inputs)
+
+
+def _reduce_chunks(items, fails):
+    # ddmin: tira pedaços de len/2, len/4, ..., 1 itens
+    chunk = max(1, len(items) // 2)
+    while chunk >= 1:
+        index = 0
+        changed = False
+        while index < len(items):
+            candidate = items[:index] + items[index + chunk:]
+            if fails(candidate):
+                items = candidate
+                changed = True
+            else:
+                index += chunk
+        if not changed:
+            chunk //= 2
+    return items
+
+
+def _unwrap_blocks(lines, fails):
+    # Tira um begin e o end; correspondente, que o ddmin não separa
+    changed = True
+    while changed:
+        changed = False
+        stack = []
+        for index, line in enumerate(lines):
+            if line.strip() == "begin":
+                stack.append(index)
+            elif line.strip() == "end;" and stack:
+                start = stack.pop()
+                candidate = lines[:start] + lines[start + 1:index] + lines[index + 1:]
+                if fails(candidate):
+                    lines = candidate
+                    changed = True
+                    break
+    return lines
+
+
+def _drop_declared(lines, fails):
+    # Tira, uma a uma, as variáveis das declarações "a, b, c: tipo;"
+    declaration = re.compile(r"^(\s*)([\w\s,]+):(\s*\w+;\s*)$")
+    for index, line in enumerate(lines):
+        if line.strip() == "begin":
+            break
+        match = declaration.match(line)
+        if not match:
+            continue
+        names = [name.strip() for name in match.group(2).split(",")]
+        for name in list(names):
+            if len(names) == 1:
+                break
+            rest = [other for other in names if other != name]
+            candidate = lines[:index] + [f"{match.group(1)}{', '.join(rest)}:{match.group(3)}"] + lines[index + 1:]
+            if fails(candidate):
+                lines = candidate
+                names = rest
+    return lines
+
+
+# Mutação de programas existentes
+
+MUTATIONS = ["number", "comparison", "operator", "duplicate", "delete", "swap"]
+
+
+def mutate(source, rng):
+    lines = source.split("\n")
+    # Só o corpo: as linhas entre o begin do programa e o end final
+    body = [index for index, line in enumerate(lines) if line.strip() and not line.strip().startswith(("program", "var"))]
+    kind = rng.choice(MUTATIONS)
+    if not body:
+        return source
+    index = rng.choice(body)
+    line = lines[index]
+    if kind == "number":
+        numbers = list(re.finditer(r"(?<![\w.])\d+(?![\w.])", line))
+        if numbers:
+            match = rng.choice(numbers)
+            line = line[:match.start()] + str(rng.choice([0, 1, 2, 7, 100, int(match.group()) + 1])) + line[match.end():]
+    elif kind == "comparison":
+        line = re.sub(r"<=|>=|<|>|(?<![:<>])=", lambda _: rng.choice(["<", "<=", ">", ">=", "="]), line, count=1)
+    elif kind == "operator":
+        line = re.sub(r" (\+|-|\*) ", lambda _: f" {rng.choice(['+', '-', '*'])} ", line, count=1)
+    elif kind == "duplicate":
+        lines.insert(index, line)
+    elif kind == "delete":
+        line = ""
+    elif kind == "swap" and index + 1 < len(lines):
+        lines[index + 1], line = line, lines[index + 1]
+    lines[index] = line
+    return "\n".join(lines)
+
+
+def corpus_programs():
+    # Programas de lista1 que têm entrada, ponto de partida das mutações
+    programs = []
+    for input_file in sorted(glob.glob(os.path.join(TESTS_DIR, "input", "lista1", "*.input"))):
+        pas_file = os.path.join(ROOT, "lista1", os.path.basename(input_file).replace(".input", ".pas"))
+        if os.path.exists(pas_file):
+            with open(pas_file, "r", encoding="utf-8") as file:
+                source = file.read()
+            with open(input_file, "r", encoding="utf-8") as file:
+                programs.append((source, file.read()))
+    return programs
+
+
+def candidates(args, rng):
+    # Programas gerados e mutantes (de lista1 ou de um programa gerado),
+    # alternando no modo "ambos"
+    corpus = corpus_programs() if args.modo != "gerar" else []
+    seed = args.seed
+    while True:
+        program = ProgramGenerator(
+            seed, args.comandos, args.profundidade, args.expressoes, args.voltas, args.io
+        ).generate(f"fuzz{seed}")
+        if args.modo == "gerar" or (args.modo == "ambos" and seed % 2 == 0):
+            yield f"gerado seed {seed}", program.source, program.input_text
+        else:
+            source, input_text = rng.choice(corpus + [(program.source, program.input_text)])
+            for _ in range(rng.randint(1, 3)):
+                source = mutate(source, rng)
+            yield f"mutante seed {seed}", source, input_text
+        seed += 1
+
+
+def save_case(directory, name, source, input_text, config, difference):
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, name)
+    with open(base + ".pas", "w", encoding="utf-8") as file:
+        file.write(source)
+    with open(base + ".input", "w", encoding="utf-8") as file:
+        file.write(input_text)
+    with open(base + ".txt", "w", encoding="utf-8") as file:
+        file.write(f"{config[0]} -O{config[1]}: {difference}\n")
+    return base
+
+
+def parse_configs(text):
+    configs = []
+    for item in text.split(","):
+        engine, _, levels = item.partition(":")
+        if engine not in ENGINES:
+            raise argparse.ArgumentTypeError(f"executor desconhecido: {engine}")
+        for level in levels or "012":
+            # reference -O0 é a própria referência
+            if (engine, int(level)) != ("reference", 0):
+                configs.append((engine, int(level)))
+    return configs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fuzzing diferencial: compara cada executor e nível de otimização com a referência em -O0"
+    )
+    parser.add_argument("--tempo", type=float, default=60, help="segundos de fuzzing (padrão: 60)")
+    parser.add_argument("-n", dest="quantidade", type=int, help="para depois de tantos programas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modo", choices=["gerar", "mutar", "ambos"], default="ambos")
+    parser.add_argument(
+        "--executores", type=parse_configs, default=parse_configs(",".join(ENGINES)),
+        help="executor[:níveis] separados por vírgula, ex.: typed:12,batch (padrão: todos em -O0, -O1 e -O2)",
+    )
+    parser.add_argument("--comandos", type=int, default=20, help="comandos por programa gerado")
+    parser.add_argument("--profundidade", type=int, default=3)
+    parser.add_argument("--expressoes", type=int, default=3)
+    parser.add_argument("--voltas", type=int, default=8)
+    parser.add_argument("--io", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=5, help="segundos por execução de um executor")
+    parser.add_argument("--tempo-minimizacao", type=float, default=60, help="segundos para minimizar cada divergência")
+    parser.add_argument("--saida", default=os.path.join(TESTS_DIR, "fuzz"), help="diretório dos casos minimizados")
+    args = parser.parse_args(argv)
+
+    if not hasattr(signal, "setitimer"):
+        print("Este teste precisa de signal.setitimer (Unix)")
+        return 2
+    signal.signal(signal.SIGALRM, _on_alarm)
+    tester = DifferentialTester(args.executores, timeout=args.timeout)
+    rng = random.Random(args.seed)
+    deadline = time.monotonic() + args.tempo
+    tested = invalid = 0
+    failures = []
+    seen = set()
+    for name, source, input_text in candidates(args, rng):
+        if time.monotonic() >= deadline or (args.quantidade is not None and tested + invalid >= args.quantidade):
+            break
+        divergences = tester.check(source, input_text)
+        if divergences is None:
+            invalid += 1
+            continue
+        tested += 1
+        for config, difference in divergences:
+            # Uma divergência por configuração e tipo de diferença (erro,
+            # saída, variável, ...) basta
+            key = (config, difference.split()[0])
+            if key in seen:
+                continue
+            seen.add(key)
+            print(f"DIVERGE {config[0]} -O{config[1]} ({name}): {difference}")
+            # A minimização também conta no tempo total
+            small_source, small_input = tester.minimize(
+                source, input_text, config, min(time.monotonic() + args.tempo_minimizacao, deadline)
+            )
+            result = tester.check(small_source, small_input, [config]) or [(config, difference)]
+            case = f"{config[0]}-O{config[1]}-{len(failures)}"
+            base = save_case(args.saida, case, small_source, small_input, config, result[0][1])
+            print(f"  minimizado para {small_source.count(chr(10)) + 1} linhas: {base}.pas")
+            failures.append(case)
+
+    print(
+        f"\n{tested} programas comparados em {len(args.executores)} configurações "
+        f"({invalid} descartados), {len(failures)} divergências"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
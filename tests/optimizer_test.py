@@ -0,0 +1,514 @@
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT)
+
+from analyzer.cleanup import CodeCleaner
+from analyzer.control_flow import ControlFlowGraph, LiveVariables
+from analyzer.execute import IntermediateCodeExecutor
+from analyzer.optimizer import IROptimizer
+from analyzer.pipeline import compile_source
+from analyzer.runtime_io import InputReader, OutputBuffer
+
+# Testes das passadas do otimizador. Cada caso devolve (passou, esperado,
+# obtido): código intermediário na entrada e na saída de uma passada, ou um
+# programa com a saída esperada em todos os níveis de otimização.
+CASES = []
+
+
+def case(function):
+    CASES.append(function)
+    return function
+
+
+def label(name):
+    return ("LABEL", name, "NONE", "NONE")
+
+
+def jump(name):
+    return ("JUMP", name, "NONE", "NONE")
+
+
+def check_pass(pass_name, instructions, expected, level=2):
+    got = getattr(IROptimizer(level), pass_name)(instructions)
+    return got == expected, expected, got
+
+
+def check_program(source, expected, input_text=""):
+    # A mesma saída (e nenhum erro) em -O0, -O1 e -O2
+    for level in (0, 1, 2):
+        program = compile_source(source, level)
+        executor = IntermediateCodeExecutor(
+            program.instructions, OutputBuffer(), InputReader(text=input_text), program.symbols
+        )
+        try:
+            executor.run()
+        except Exception as e:
+            return False, expected, f"-O{level}: erro {e}"
+        if executor.output != expected:
+            return False, expected, f"-O{level}: {executor.output}"
+    return True, expected, expected
+
+
+# Dobramento de constantes
+
+@case
+def fold_constants_chain():
+    # O valor de cada temporário segue para as instruções seguintes do bloco,
+    # e o IF com condição conhecida vira JUMP
+    return check_pass("fold_constants", [
+        ("ATT", "x", "0", "NONE"),
+        ("ADD", "%t1", '"2"', '"3"'),
+        ("MUL", "%t2", "%t1", '"4"'),
+        ("ATT", "x", "%t2", "NONE"),
+        ("LT", "%t3", "x", '"10"'),
+        ("IF", "%t3", "L1", "L2"),
+        label("L1"),
+        ("CALL", "WRITE", '"a"', "NONE"),
+        label("L2"),
+    ], [
+        ("ATT", "x", "0", "NONE"),
+        ("ATT", "%t1", "5", "NONE"),
+        ("ATT", "%t2", "20", "NONE"),
+        ("ATT", "x", "20", "NONE"),
+        ("ATT", "%t3", "0", "NONE"),
+        jump("L2"),
+        label("L1"),
+        ("CALL", "WRITE", '"a"', "NONE"),
+        label("L2"),
+    ])
+
+
+@case
+def fold_constants_keeps_failing_operation():
+    # String + inteiro dá erro na execução: o erro não pode sumir no dobramento
+    code = [("ADD", "%t1", '"a"', '"1"'), ("CALL", "WRITE", "%t1", "NONE")]
+    return check_pass("fold_constants", code, list(code))
+
+
+# Propagação de cópias e temporários mortos
+
+@case
+def propagate_copies_single_use():
+    # Só some o par OP T; ATT x T com T usado uma vez e no mesmo bloco
+    return check_pass("propagate_copies", [
+        ("ADD", "%t1", "a", "b"),
+        ("ATT", "x", "%t1", "NONE"),
+        ("MUL", "%t2", "a", "b"),
+        ("ATT", "y", "%t2", "NONE"),
+        ("CALL", "WRITE", "%t2", "NONE"),
+        ("SUB", "%t3", "a", "b"),
+        label("L1"),
+        ("ATT", "z", "%t3", "NONE"),
+    ], [
+        ("ADD", "x", "a", "b"),
+        ("MUL", "%t2", "a", "b"),
+        ("ATT", "y", "%t2", "NONE"),
+        ("CALL", "WRITE", "%t2", "NONE"),
+        ("SUB", "%t3", "a", "b"),
+        label("L1"),
+        ("ATT", "z", "%t3", "NONE"),
+    ])
+
+
+@case
+def eliminate_dead_temps_chain():
+    # %t2 não é lido; sem ele %t1 também fica sem uso
+    return check_pass("eliminate_dead_temps", [
+        ("ADD", "%t1", "a", "b"),
+        ("MUL", "%t2", "%t1", "c"),
+        ("SUB", "%t3", "a", "b"),
+        ("CALL", "WRITE", "%t3", "NONE"),
+    ], [
+        ("SUB", "%t3", "a", "b"),
+        ("CALL", "WRITE", "%t3", "NONE"),
+    ])
+
+
+# CFG e análise de fluxo de dados
+
+@case
+def control_flow_while_loop():
+    # while i < n do i := i + 1; write(i): blocos, arestas, o laço natural
+    # e as variáveis vivas na entrada de cada bloco
+    cfg = ControlFlowGraph([
+        ("ATT", "i", '"0"', "NONE"),
+        label("L1"),
+        ("LT", "%t1", "i", "n"),
+        ("IF", "%t1", "L2", "L3"),
+        label("L2"),
+        ("ADD", "i", "i", '"1"'),
+        jump("L1"),
+        label("L3"),
+        ("CALL", "WRITE", "i", "NONE"),
+    ])
+    liveness = LiveVariables().solve(cfg)
+    got = (
+        [[succ.index for succ in block.successors] for block in cfg.blocks],
+        [(loop.header.index, sorted(loop.blocks)) for loop in cfg.natural_loops()],
+        [sorted(liveness.block_in[block.index]) for block in cfg.blocks],
+    )
+    expected = (
+        [[1], [2, 3], [1], []],
+        [(1, [1, 2])],
+        [["n"], ["i", "n"], ["i", "n"], ["i"]],
+    )
+    return got == expected, expected, got
+
+
+# Reaproveitamento de temporários
+
+@case
+def allocate_temps_by_liveness_and_type():
+    # %t1 e %t2 não vivem juntos e dividem um slot; %t3 e %t4 vivem juntos;
+    # %t5 é real e não entra num slot de inteiros
+    return check_pass("allocate_temps", [
+        ("ATT", "a", "0", "NONE"),
+        ("ATT", "b", "0", "NONE"),
+        ("ATT", "x", "0", "NONE"),
+        ("ADD", "%t1", "a", "b"),
+        ("CALL", "WRITE", "%t1", "NONE"),
+        ("MUL", "%t2", "a", "b"),
+        ("CALL", "WRITE", "%t2", "NONE"),
+        ("ADD", "%t3", "a", "b"),
+        ("SUB", "%t4", "a", "b"),
+        ("ADD", "x", "%t3", "%t4"),
+        ("DIV", "%t5", "a", "b"),
+        ("CALL", "WRITE", "%t5", "NONE"),
+    ], [
+        ("ATT", "a", "0", "NONE"),
+        ("ATT", "b", "0", "NONE"),
+        ("ATT", "x", "0", "NONE"),
+        ("ADD", "%t1", "a", "b"),
+        ("CALL", "WRITE", "%t1", "NONE"),
+        ("MUL", "%t1", "a", "b"),
+        ("CALL", "WRITE", "%t1", "NONE"),
+        ("ADD", "%t1", "a", "b"),
+        ("SUB", "%t2", "a", "b"),
+        ("ADD", "x", "%t1", "%t2"),
+        ("DIV", "%t3", "a", "b"),
+        ("CALL", "WRITE", "%t3", "NONE"),
+    ])
+
+
+@case
+def allocate_temps_user_variable_named_like_temp():
+    # Uma variável T3 do programa não pode ser tomada por temporário
+    return check_program("""program clash;
+var T3, a, x: integer;
+begin
+  readln(x);
+  T3 := x * 4;
+  a := (x + 1) * (x - 1);
+  writeln(T3, ' ', a);
+end.
+""", "\n40 99\n", "10\n")
+
+
+# Otimizações de laço
+
+@case
+def optimize_loops_hoist_and_reduce():
+    # k * k sobe para o pré-cabeçalho, dentro da guarda do FOR_INIT, e
+    # i * 3 vira um temporário que soma 3 a cada volta
+    return check_pass("optimize_loops", [
+        ("ATT", "i", "0", "NONE"),
+        ("ATT", "n", "0", "NONE"),
+        ("ATT", "k", "0", "NONE"),
+        ("ATT", "s", "0", "NONE"),
+        ("ATT", "i", '"1"', "NONE"),
+        ("FOR_INIT", "i", "n", "L3"),
+        label("L2"),
+        ("MUL", "%t1", "k", "k"),
+        ("MUL", "%t2", "i", '"3"'),
+        ("ADD", "%t3", "s", "%t2"),
+        ("ADD", "s", "%t3", "%t1"),
+        ("FOR_NEXT", "i", "n", "L2"),
+        label("L3"),
+        ("CALL", "WRITE", "s", "NONE"),
+    ], [
+        ("ATT", "i", "0", "NONE"),
+        ("ATT", "n", "0", "NONE"),
+        ("ATT", "k", "0", "NONE"),
+        ("ATT", "s", "0", "NONE"),
+        ("ATT", "i", '"1"', "NONE"),
+        ("FOR_INIT", "i", "n", "L3"),
+        label("L4"),
+        ("MUL", "%t1", "k", "k"),
+        ("MUL", "%t4", "i", '"3"'),
+        label("L2"),
+        ("ADD", "%t3", "s", "%t4"),
+        ("ADD", "s", "%t3", "%t1"),
+        ("ADD", "%t4", "%t4", "3"),
+        ("FOR_NEXT", "i", "n", "L2"),
+        label("L3"),
+        ("CALL", "WRITE", "s", "NONE"),
+    ])
+
+
+LOOP_PROGRAM = """program inv;
+var i, n, d, k, s: integer;
+begin
+  readln(n);
+  readln(d);
+  readln(k);
+  s := 0;
+  for i := 1 to n do
+    s := s + i * 3 + k * k + 100 div d;
+  i := 0;
+  while i < n do
+  begin
+    s := s + k * k;
+    i := i + 1;
+  end;
+  writeln(s);
+end.
+"""
+
+
+@case
+def optimize_loops_zero_trip():
+    # Sem nenhuma volta o que subiu para o pré-cabeçalho não pode mudar a
+    # saída nem dar erro (d = 0 no div)
+    return check_program(LOOP_PROGRAM, "\n\n\n0\n", "0\n0\n7\n")
+
+
+@case
+def optimize_loops_some_trips():
+    return check_program(LOOP_PROGRAM, "\n\n\n62\n", "4\n0\n2\n")
+
+
+# FOR_INIT/FOR_NEXT
+
+FOR_PROGRAM = """program mut;
+var i, n: integer;
+begin
+  n := 10;
+  for i := 1 to n do
+  begin
+    write(i, ' ');
+    i := i + 2;
+    n := n - 1;
+  end;
+  writeln(i);
+  for i := 5 to 4 do
+    write('nunca');
+  writeln(i);
+end.
+"""
+
+
+@case
+def counted_loop_lowered():
+    ops = {inst[0] for inst in compile_source(FOR_PROGRAM, 1).instructions}
+    expected = {"FOR_INIT", "FOR_NEXT"}
+    return expected <= ops, expected, ops & expected
+
+
+@case
+def counted_loop_variable_mutated_in_body():
+    # O corpo altera o contador e o limite: cada volta compara com os valores
+    # atuais, como o laço com IF do -O0. Com início > fim o corpo não roda.
+    return check_program(FOR_PROGRAM, "1 4 7 10\n5\n")
+
+
+# Numeração de valores
+
+@case
+def number_values_reuses_and_invalidates():
+    # b + a é o mesmo valor de a + b; depois de a mudar, a * b é outro valor
+    return check_pass("number_values", [
+        ("ATT", "a", "0", "NONE"),
+        ("ATT", "b", "0", "NONE"),
+        ("ATT", "x", "0", "NONE"),
+        ("ADD", "%t1", "a", "b"),
+        ("ADD", "%t2", "b", "a"),
+        ("ADD", "x", "%t1", "%t2"),
+        ("MUL", "%t3", "a", "b"),
+        ("ATT", "a", "x", "NONE"),
+        ("MUL", "%t4", "a", "b"),
+        ("ADD", "x", "%t3", "%t4"),
+    ], [
+        ("ATT", "a", "0", "NONE"),
+        ("ATT", "b", "0", "NONE"),
+        ("ATT", "x", "0", "NONE"),
+        ("ADD", "%t1", "a", "b"),
+        ("ADD", "x", "%t1", "%t1"),
+        ("MUL", "%t3", "a", "b"),
+        ("ATT", "a", "x", "NONE"),
+        ("MUL", "%t4", "a", "b"),
+        ("ADD", "x", "%t3", "%t4"),
+    ])
+
+
+@case
+def number_values_string_concatenation_not_commutative():
+    code = [
+        ("ATT", "s", '""', "NONE"),
+        ("ATT", "t", '""', "NONE"),
+        ("ADD", "%t1", "s", "t"),
+        ("ADD", "%t2", "t", "s"),
+        ("CALL", "WRITE", "%t1", "NONE"),
+        ("CALL", "WRITE", "%t2", "NONE"),
+    ]
+    return check_pass("number_values", code, list(code))
+
+
+# Limpeza
+
+def check_cleaner(method, instructions, expected):
+    got = getattr(CodeCleaner(IROptimizer(1)), method)(instructions)
+    return got == expected, expected, got
+
+
+@case
+def remove_dead_stores_entry_block():
+    # No bloco de entrada fica a primeira atribuição (a declaração fixa o
+    # tipo); a que é sobrescrita sem leitura e a do fim saem
+    return check_cleaner("remove_dead_stores", [
+        ("ATT", "x", "0", "NONE"),
+        ("ATT", "x", '"5"', "NONE"),
+        ("ATT", "x", '"7"', "NONE"),
+        ("CALL", "WRITE", "x", "NONE"),
+        ("ATT", "x", '"9"', "NONE"),
+    ], [
+        ("ATT", "x", "0", "NONE"),
+        ("ATT", "x", '"7"', "NONE"),
+        ("CALL", "WRITE", "x", "NONE"),
+    ])
+
+
+@case
+def remove_jumps_to_next_inverts_branch():
+    # BR_LT a 3 L1; JUMP L2; LABEL L1  ->  BR_GTE a 3 L2; LABEL L1
+    return check_cleaner("remove_jumps_to_next", [
+        ("ATT", "a", "0", "NONE"),
+        ("BR_LT", "a", '"3"', "L1"),
+        jump("L2"),
+        label("L1"),
+        ("CALL", "WRITE", '"maior ou igual"', "NONE"),
+        label("L2"),
+    ], [
+        ("ATT", "a", "0", "NONE"),
+        ("BR_GTE", "a", '"3"', "L2"),
+        label("L1"),
+        ("CALL", "WRITE", '"maior ou igual"', "NONE"),
+        label("L2"),
+    ])
+
+
+@case
+def remove_jumps_to_next_keeps_equality_branch():
+    # Não há BR para "diferente": o BR_EQ fica com o JUMP
+    code = [
+        ("ATT", "a", "0", "NONE"),
+        ("BR_EQ", "a", '"3"', "L1"),
+        jump("L2"),
+        label("L1"),
+        ("CALL", "WRITE", '"x"', "NONE"),
+        label("L2"),
+    ]
+    return check_cleaner("remove_jumps_to_next", code, list(code))
+
+
+@case
+def clean_up_unreachable_and_threaded():
+    # O código depois do JUMP sem label some, o JUMP para um JUMP vai direto
+    # ao destino final e o que sobra cai no destino sem salto
+    return check_pass("clean_up", [
+        jump("L1"),
+        ("CALL", "WRITE", '"morto"', "NONE"),
+        label("L1"),
+        jump("L3"),
+        label("L2"),
+        ("CALL", "WRITE", '"x"', "NONE"),
+        label("L3"),
+        ("CALL", "WRITE", '"y"', "NONE"),
+    ], [
+        ("CALL", "WRITE", '"y"', "NONE"),
+    ])
+
+
+OR_PROGRAM = """program inv;
+var a: integer;
+begin
+  readln(a);
+  if (a < 3) or (a > 10) then
+  begin
+    writeln('fora');
+  end;
+  else
+  begin
+    writeln('dentro');
+  end;
+  writeln('fim');
+end.
+"""
+
+
+@case
+def clean_up_inverted_branch_program():
+    # O primeiro teste do or vira BR_GTE no -O1: os três caminhos
+    for value, expected in (("1", "\nfora\nfim\n"), ("5", "\ndentro\nfim\n"), ("11", "\nfora\nfim\n")):
+        result = check_program(OR_PROGRAM, expected, value + "\n")
+        if not result[0]:
+            return result
+    return result
+
+
+# Superinstruções
+
+@case
+def fuse_superinstructions_pairs():
+    # Pares de WRITE viram WRITELN/WRITE2; o terceiro fica sozinho e o LABEL
+    # impede a fusão com o seguinte
+    return check_pass("fuse_superinstructions", [
+        ("CALL", "WRITE", "x", "NONE"),
+        ("CALL", "WRITE", "\\n", "NONE"),
+        ("CALL", "WRITE", '"a"', "NONE"),
+        ("CALL", "WRITE", "y", "NONE"),
+        ("CALL", "WRITE", "z", "NONE"),
+        label("L1"),
+        ("CALL", "WRITE", "w", "NONE"),
+    ], [
+        ("CALL", "WRITELN", "x", "NONE"),
+        ("CALL", "WRITE2", '"a"', "y"),
+        ("CALL", "WRITE", "z", "NONE"),
+        label("L1"),
+        ("CALL", "WRITE", "w", "NONE"),
+    ])
+
+
+@case
+def fuse_superinstructions_program():
+    return check_program("""program escrita;
+var a, b: integer;
+begin
+  a := 7;
+  b := a * 2;
+  write('a = ', a, ' ');
+  writeln(b);
+  writeln('fim');
+end.
+""", "a = 7 14\nfim\n")
+
+
+def main():
+    failed = 0
+    for function in CASES:
+        passed, expected, got = function()
+        print(f"{'PASSED' if passed else 'FAILED'} {function.__name__}")
+        if not passed:
+            failed += 1
+            print("Expected:")
+            print(expected)
+            print("Got:")
+            print(got)
+    print(f"\n{len(CASES) - failed}/{len(CASES)} passaram")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT)
+
+from analyzer.lexicalAnalysis import LexicalError
+from analyzer.runtime_io import InputReader, OutputBuffer
+from analyzer.pipeline import compile_file
+from analyzer.semantic_analysis import SemanticError
+from analyzer.SyntacticAnalysis import SyntaxError as ParseError
+from main import EXECUTORS
+
+# Programas compilados pelo processo pai antes de criar os workers: com fork
+# cada worker herda o dicionário (copy-on-write) e não recompila nada
+PROGRAMS = {}
+
+
+def compile_programs(cases, opt_level):
+    for pas_file, _, _ in cases:
+        if pas_file in PROGRAMS:
+            continue
+        # Erro de compilação: guarda a mesma saída que o main.py imprime no
+        # lugar do programa
+        try:
+            PROGRAMS[pas_file] = compile_file(pas_file, opt_level)
+        except LexicalError as e:
+            PROGRAMS[pas_file] = f"Erro léxico: {e}\n"
+        except ParseError as e:
+            PROGRAMS[pas_file] = f"Erro sintático: {e}\n"
+        except SemanticError as se:
+            PROGRAMS[pas_file] = f"Erro semântico: {se}\n"
+
+
+def run_case(case, engine):
+    pas_file, input_file, expected_file = case
+    start = time.perf_counter()
+    program = PROGRAMS[pas_file]
+    error = None
+    if isinstance(program, str):
+        output = program
+    else:
+        try:
+            with open(input_file, "r") as file:
+                reader = InputReader(text=file.read())
+        except OSError as e:
+            # Sem o .input o caso falha, como no auto_test, em vez de
+            # derrubar o pool
+            elapsed = time.perf_counter() - start
+            return False, elapsed, "", _read_expected(expected_file), e
+        executor = EXECUTORS[engine](program.instructions, OutputBuffer(), reader, program.symbols)
+        try:
+            executor.run()
+        except Exception as e:
+            error = e
+        output = executor.output
+    elapsed = time.perf_counter() - start
+    expected = _read_expected(expected_file)
+    return output == expected, elapsed, output, expected, error
+
+
+def _read_expected(expected_file):
+    with open(expected_file, "r") as file:
+        return file.read()
+
+
+def _run_indexed(job):
+    index, case, engine = job
+    return index, run_case(case, engine)
+
+
+def find_cases(program_path, input_dir, output_dir):
+    cases = []
+    for output_file in sorted(os.listdir(output_dir)):
+        if output_file.endswith(".out"):
+            cases.append((
+                os.path.join(program_path, output_file.replace(".out", ".pas")),
+                os.path.join(input_dir, output_file.replace(".out", ".input")),
+                os.path.join(output_dir, output_file),
+            ))
+    return cases
+
+
+def run_all_tests(cases, engine="reference", workers=None):
+    jobs = [(index, case, engine) for index, case in enumerate(cases)]
+    if workers == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        # Sem fork os workers não herdariam PROGRAMS: roda tudo aqui mesmo
+        yield from map(_run_indexed, jobs)
+        return
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        yield from pool.imap_unordered(_run_indexed, jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roda os casos de teste em paralelo, compilando cada programa uma vez")
+    parser.add_argument("-j", dest="workers", type=int, default=os.cpu_count(), help="número de processos (padrão: núcleos)")
+    parser.add_argument("-O", dest="opt_level", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--engine", choices=sorted(EXECUTORS), default="reference")
+    parser.add_argument("--programas", default=os.path.join(ROOT, "lista1"))
+    parser.add_argument("--entradas", default=os.path.join(TESTS_DIR, "input", "lista1"))
+    parser.add_argument("--saidas", default=os.path.join(TESTS_DIR, "out", "lista1"))
+    args = parser.parse_args(argv)
+
+    wall = time.perf_counter()
+    cases = find_cases(args.programas, args.entradas, args.saidas)
+    compile_programs(cases, args.opt_level)
+    compile_time = time.perf_counter() - wall
+
+    results = [None] * len(cases)
+    for index, result in run_all_tests(cases, args.engine, args.workers):
+        results[index] = result
+
+    failed = 0
+    for (pas_file, _, expected_file), (passed, elapsed, output, expected, error) in zip(cases, results):
+        name = os.path.basename(expected_file)
+        print(f"{'PASSED' if passed else 'FAILED'} {name} ({elapsed * 1000:.1f} ms)")
+        if not passed:
+            failed += 1
+            print("Expected:")
+            print(expected)
+            print("Got:")
+            print(output)
+            if error is not None:
+                print(f"Erro durante a execução: {error}")
+    wall = time.perf_counter() - wall
+    print(
+        f"\n{len(cases) - failed}/{len(cases)} passaram em {wall:.2f}s "
+        f"(compilação {compile_time:.2f}s, {args.workers} processos)"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())